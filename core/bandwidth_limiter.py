@@ -0,0 +1,269 @@
+# Script by: DarkSplash
+# Last edited: 2026-10-19
+
+# This is one of the dependency scripts for the downloader/uploader script.
+# This specific script shapes how much bandwidth the transfers use so they don't
+# take over a slow shared link. Every transfer thread in a script draws from one
+# shared token bucket of bytes, and transfers with a higher priority are handed
+# bytes before lower priority ones, even if the lower priority transfer started
+# first. The bucket lives in memory, so separate scripts each get their own.
+
+import concurrent.futures
+import itertools
+import queue
+import threading
+import time
+
+# Packageless Terminal Colors: https://stackoverflow.com/a/21786287
+RED = "\x1b[1;31;40m"
+CLEAR = "\x1b[0m"
+
+PRIORITY_URGENT = 0                                     # Lower numbers are served first
+PRIORITY_NORMAL = 1
+PRIORITY_BULK = 2
+PRIORITIES = {"urgent": PRIORITY_URGENT, "normal": PRIORITY_NORMAL, "bulk": PRIORITY_BULK}
+
+THROTTLE_SLICE = 65536                                  # 64 KiB, how many bytes are sent/received per limiter check
+
+
+
+class BandwidthLimiter:
+    """
+    Class for a thread safe token bucket of bytes shared by every transfer.
+    The bucket refills at bytesPerSecond and holds at most burst bytes. A
+    transfer waits while there are fewer bytes in the bucket than it asks for,
+    and also while any transfer with a higher priority is waiting. The rate
+    can be changed at any time with setRate().
+
+    Parameters
+    ----------
+    bytesPerSecond : int, optional
+        The shared limit in bytes per second. None or 0 means unlimited.
+    burst : int, optional
+        The most bytes that can be sent at once after being idle. By default
+        this is one second's worth of bytes.
+    """
+    def __init__(self, bytesPerSecond: int = None, burst: int = None):
+        self.condition = threading.Condition()
+        self.waiting = [0] * len(PRIORITIES)            # How many transfers of each priority are waiting for bytes
+        self.rate = None
+        self.burst = 0
+        self.tokens = 0
+        self.updated = time.monotonic()
+        self.setRate(bytesPerSecond, burst)
+
+
+    def setRate(self, bytesPerSecond: int = None, burst: int = None):
+        """
+        Function changes the limit, taking effect for every transfer right
+        away. None or 0 removes the limit.
+        """
+        with self.condition:
+            self.refill()
+            self.rate = bytesPerSecond or None
+            self.burst = burst or max(bytesPerSecond or 0, THROTTLE_SLICE)
+            self.tokens = min(self.tokens, self.burst) if self.rate else self.burst
+            self.condition.notify_all()
+
+
+    def refill(self):
+        """
+        Function adds the bytes earned since the last refill to the bucket.
+        Must be called with the condition held.
+        """
+        now = time.monotonic()
+        if self.rate:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+    def consume(self, size: int, priority: int = PRIORITY_NORMAL):
+        """
+        Function blocks until size bytes may be transferred. Requests bigger
+        than the bucket are let through once it is full and leave the bucket
+        in debt, so the average rate still holds.
+        """
+        with self.condition:
+            self.waiting[priority] += 1
+            try:
+                while self.rate:
+                    self.refill()
+                    higherWaiting = any(self.waiting[:priority])
+                    needed = min(size, self.burst)
+                    if not higherWaiting and self.tokens >= needed:
+                        self.tokens -= size
+                        return
+                    timeout = (needed - self.tokens) / self.rate if not higherWaiting else None
+                    self.condition.wait(timeout if timeout is None else max(timeout, 0.001))
+            finally:
+                self.waiting[priority] -= 1
+                self.condition.notify_all()             # Lets lower priority transfers check again
+
+
+    def throttle(self, chunks, priority: int = PRIORITY_NORMAL):
+        """
+        Generator function that passes chunks through in THROTTLE_SLICE sized
+        pieces, waiting for the limiter before each piece.
+        """
+        for chunk in chunks:
+            for start in range(0, len(chunk), THROTTLE_SLICE):
+                piece = chunk[start:start + THROTTLE_SLICE]
+                self.consume(len(piece), priority)
+                yield piece
+
+
+    def wrap(self, data: bytes, priority: int = PRIORITY_NORMAL):
+        """
+        Function wraps a request body so it is read through the limiter while
+        it is being sent. Unlike a generator, the returned object has a length,
+        so requests still sends a Content-Length header instead of a chunked body.
+        """
+        return ThrottledReader(data, self, priority)
+
+
+
+class ThrottledReader:
+    """
+    Class for a file-like request body that waits on a BandwidthLimiter every
+    time the HTTP library reads the next block from it.
+    """
+    def __init__(self, data: bytes, limiter: BandwidthLimiter, priority: int):
+        self.data = memoryview(data)
+        self.position = 0
+        self.limiter = limiter
+        self.priority = priority
+
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+
+    def tell(self) -> int:
+        return self.position
+
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        self.position = offset if whence == 0 else (self.position + offset if whence == 1 else len(self.data) + offset)
+        return self.position
+
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = len(self.data) - self.position
+        piece = self.data[self.position:self.position + min(size, THROTTLE_SLICE)]
+        self.position += len(piece)
+        if piece:
+            self.limiter.consume(len(piece), self.priority)
+        return piece.tobytes()
+
+
+
+def throttleBody(limiter, data: bytes, priority: int = PRIORITY_NORMAL):
+    """
+    Function returns data wrapped with limiter.wrap(), or data itself if
+    limiter is None so callers don't need to check.
+    """
+    return data if limiter is None else limiter.wrap(data, priority)
+
+
+
+def throttleChunks(limiter, chunks, priority: int = PRIORITY_NORMAL):
+    """
+    Function returns chunks passed through limiter.throttle(), or chunks
+    itself if limiter is None so callers don't need to check.
+    """
+    return chunks if limiter is None else limiter.throttle(chunks, priority)
+
+
+
+def createLimiter(limitKiB: int = None, limitFile: str = None):
+    """
+    Function creates the shared BandwidthLimiter from the --limit and
+    --limit-file runtime arguments. Returns None if neither was given. The
+    limit only covers the transfers of the script that created it.
+    """
+    if not limitKiB and not limitFile:
+        return None
+    limiter = BandwidthLimiter((limitKiB or 0) * 1024)
+    if limitFile:
+        watchLimitFile(limiter, limitFile)
+    return limiter
+
+
+
+def watchLimitFile(limiter: BandwidthLimiter, path: str, interval: int = 5):
+    """
+    Function starts a background thread that reads a limit in KiB per second
+    from the file at path every interval seconds and applies it with
+    setRate(), so the limit of a running transfer can be changed by editing
+    the file. A limit of 0 removes the limit.
+    """
+    def watch():
+        current = None
+        while True:
+            try:
+                with open(path) as file:
+                    limit = int(file.read().strip() or 0)
+                if limit != current:
+                    limiter.setRate(limit * 1024)
+                    current = limit
+            except FileNotFoundError:
+                pass
+            except ValueError:
+                print(f"\n{RED}Limit file \"{path}\" should only hold a number of KiB per second{CLEAR}")
+            time.sleep(interval)
+
+    threading.Thread(target=watch, daemon=True).start()
+
+
+
+class TransferQueue:
+    """
+    Class for a pool of transfer threads that always start the queued job
+    with the best (lowest) priority, and inside a priority the smallest
+    sortKey. An urgent job submitted while bulk jobs are queued starts as
+    soon as a thread is free.
+
+    Parameters
+    ----------
+    workers : int
+        How many jobs can run at the same time.
+    """
+    def __init__(self, workers: int):
+        self.queue = queue.PriorityQueue()
+        self.counter = itertools.count()                # Keeps jobs with equal priority and sortKey first in first out
+        self.threads = [threading.Thread(target=self.worker, daemon=True) for _ in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+
+    def submit(self, function, *args, priority: int = PRIORITY_NORMAL, sortKey: int = 0) -> concurrent.futures.Future:
+        """
+        Function queues function(*args) and returns a Future for its result.
+        """
+        future = concurrent.futures.Future()
+        self.queue.put((priority, sortKey, next(self.counter), function, args, future))
+        return future
+
+
+    def worker(self):
+        while True:
+            priority, sortKey, count, function, args, future = self.queue.get()
+            if function is None:                        # Shutdown marker, sorts after every real job
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(function(*args))
+            except Exception as e:
+                future.set_exception(e)
+
+
+    def shutdown(self):
+        """
+        Function waits for every queued job to finish and stops the threads.
+        """
+        for _ in self.threads:
+            self.queue.put((len(PRIORITIES), 0, next(self.counter), None, None, None))
+        for thread in self.threads:
+            thread.join()
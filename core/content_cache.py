@@ -0,0 +1,255 @@
+# Script by: DarkSplash
+# Last edited: 2026-10-19
+
+# This is one of the dependency scripts for the downloader script.
+# This specific script is a local cache of downloaded files that can be shared by
+# every job on the same PC. Files are stored by their content hash (or eTag), so
+# a file that was already downloaded once is linked into place instead of being
+# downloaded again. The cache is capped in size and evicts the least recently
+# used files first.
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+
+try:                                                    # fcntl only exists on *nix, reflinks are skipped on Windows
+    import fcntl
+except ImportError:
+    fcntl = None
+
+FICLONE = 0x40049409                                    # Linux ioctl that makes a copy-on-write clone (reflink) of a file
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key             TEXT PRIMARY KEY,
+    size            INTEGER NOT NULL,
+    last_access     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE TABLE IF NOT EXISTS stats (
+    name            TEXT PRIMARY KEY,
+    value           INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO stats VALUES ('hits', 0), ('misses', 0);
+"""
+
+
+
+def cacheKey(item: dict) -> str:
+    """
+    Function picks the cache key for an item from the Graph "drives" API. The
+    content hashes are preferred since two different items with the same
+    contents then share one cached file. Folders and items without any hash
+    fall back to their eTag, which changes every time the item does.
+
+    Parameters
+    ----------
+    item : dict
+        The item's JSON returned by Microsoft Graph.
+
+    Returns
+    -------
+    key : str
+        A string such as "quickXorHash:..." or "eTag:...".
+    """
+    hashes = item.get("file", {}).get("hashes", {})
+    for hashType in ("sha256Hash", "sha1Hash", "quickXorHash"):
+        if hashes.get(hashType):
+            return f"{hashType}:{hashes[hashType]}"
+    return f"eTag:{item['eTag']}"
+
+
+
+def removeTarget(target: str):
+    """
+    Function deletes target if it exists so it can be written again. This also
+    breaks any hardlink to a cached file left behind by older versions of this
+    script, which would otherwise be read-only and share the cached contents.
+    """
+    if os.path.lexists(target):
+        if not os.path.islink(target):
+            os.chmod(target, 0o644)                     # Windows refuses to delete read-only files
+        os.remove(target)
+
+
+
+def linkFile(source: str, target: str) -> str:
+    """
+    Function puts a cached file at target without copying it if possible. A
+    reflink (copy-on-write clone) is tried first, and if the filesystem doesn't
+    support them it is copied. Hardlinks are never used, since the target would
+    then share the cached file: editing it would change the cache, and evicted
+    files would keep using disk space through the link.
+
+    Returns
+    -------
+    method : str
+        Either "reflink" or "copy".
+    """
+    removeTarget(target)
+
+    if fcntl is not None:
+        try:
+            with open(source, "rb") as sourceFile, open(target, "wb") as targetFile:
+                fcntl.ioctl(targetFile.fileno(), FICLONE, sourceFile.fileno())
+            return "reflink"
+        except OSError:
+            os.remove(target)
+    shutil.copyfile(source, target)                     # Only copies the contents, so the target isn't read-only like the cached file
+    return "copy"
+
+
+
+class ContentCache:
+    """
+    Class for the shared content cache. Cached files live in
+    cacheDir/objects and their sizes, last access times, and the hit/miss
+    counters live in cacheDir/cache.db, so several scripts can use the same
+    cache at once. Cached files are made read-only so nothing edits them by
+    accident, while the files handed out by linkFile() are writable copies.
+
+    Parameters
+    ----------
+    cacheDir : str
+        Directory the cache is kept in, created if it doesn't exist.
+    maxBytes : int
+        The most disk space the cached files are allowed to use.
+    """
+    def __init__(self, cacheDir: str, maxBytes: int):
+        self.cacheDir = cacheDir
+        self.maxBytes = maxBytes
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(cacheDir, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(cacheDir, "tmp"), exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(cacheDir, "cache.db"), timeout=60, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.executescript(CACHE_SCHEMA)
+
+
+    def objectPath(self, key: str) -> str:
+        """
+        Function returns where the file for key is stored. Keys are hashed so
+        they are always safe to use as file names.
+        """
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.cacheDir, "objects", digest[:2], digest)
+
+
+    def get(self, key: str):
+        """
+        Function looks up key, counting it as a hit or a miss.
+
+        Returns
+        -------
+        path : str or None
+            The cached file's path, or None if it isn't cached.
+        """
+        path = self.objectPath(key)
+        with self.lock, self.connection:
+            found = self.connection.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone() is not None and os.path.exists(path)
+            if found:
+                self.connection.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            else:
+                self.connection.execute("DELETE FROM entries WHERE key = ?", (key,))   # In case the file was deleted by hand
+            self.connection.execute("UPDATE stats SET value = value + 1 WHERE name = ?", ("hits" if found else "misses",))
+        return path if found else None
+
+
+    def materialize(self, key: str, target: str) -> bool:
+        """
+        Function puts the cached file for key at target with linkFile().
+
+        Returns
+        -------
+        hit : bool
+            True if key was cached and target now exists, False otherwise.
+        """
+        path = self.get(key)
+        if path is None:
+            return False
+        try:
+            linkFile(path, target)
+        except FileNotFoundError:                       # Another job evicted it in between
+            return False
+        return True
+
+
+    def put(self, key: str, chunks, target: str = None) -> str:
+        """
+        Function writes chunks into the cache under key and, if target is
+        given, links it into place. The file is written to a temporary name
+        first and renamed when complete, so other jobs never see a partial file.
+        Least recently used files are evicted afterwards if the cache is over
+        its size limit.
+
+        Parameters
+        ----------
+        key : str
+            The key returned by cacheKey().
+        chunks : iterable of bytes
+            The file's contents, such as a download stream.
+        target : str, optional
+            Where the file should end up once it is cached.
+
+        Returns
+        -------
+        path : str
+            The cached file's path.
+        """
+        path = self.objectPath(key)
+        tmpPath = os.path.join(self.cacheDir, "tmp", uuid.uuid4().hex)
+        size = 0
+        try:
+            with open(tmpPath, "wb") as file:
+                for chunk in chunks:
+                    file.write(chunk)
+                    size += len(chunk)
+            os.chmod(tmpPath, 0o444)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmpPath, path)
+        finally:
+            if os.path.exists(tmpPath):
+                os.chmod(tmpPath, 0o644)
+                os.remove(tmpPath)
+
+        if target is not None:
+            linkFile(path, target)
+        with self.lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", (key, size, time.time()))
+        self.evict()
+        return path
+
+
+    def evict(self):
+        """
+        Function deletes the least recently used files until the cache fits
+        in maxBytes again.
+        """
+        with self.lock, self.connection:
+            total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            rows = self.connection.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall()
+            for key, size in rows:
+                if total <= self.maxBytes:
+                    break
+                path = self.objectPath(key)
+                if os.path.exists(path):
+                    os.chmod(path, 0o644)               # Windows refuses to delete read-only files
+                    os.remove(path)
+                self.connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+
+
+    def stats(self) -> dict:
+        """
+        Function returns the cache's hit and miss counters along with how many
+        files and bytes it currently holds.
+        """
+        with self.lock:
+            stats = dict(self.connection.execute("SELECT name, value FROM stats").fetchall())
+            stats["entries"], stats["bytes"] = self.connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        stats["maxBytes"] = self.maxBytes
+        return stats
@@ -1,14 +1,18 @@
 # Script by: DarkSplash
-# Last edited: 2023-01-03
+# Last edited: 2026-10-19
 
 # This is one of the dependency scripts for the downloader/uploader script.
 # This specific script checks to make sure you have either properly configured
 # your msal_config.env file, or will ask if you want the script to make you a
-# template msal_config.env file for you to use during setup.
+# template msal_config.env file for you to use during setup. The file is read and
+# checked once into an M365Config object, which is then handed to every function
+# that needs it. One file can hold several profiles (tenants, drives, and paths) by
+# prefixing variables with the profile's name, such as ARCHIVE__M365_DRIVE_ID.
 
-from dotenv import load_dotenv
+from dotenv import dotenv_values
 from pathlib import Path
 
+import dataclasses
 import os
 
 # Packageless Terminal Colors: https://stackoverflow.com/a/21786287
@@ -17,25 +21,111 @@ REDHIGHLIGHT = "\x1b[1;31;41m"
 GREEN = "\x1b[1;32;40m"
 CLEAR = "\x1b[0m"
 
+MFA_HINT = [f"If you wish to run the script without MFA, add the flag {GREEN}-N{CLEAR} or {GREEN}--nomfa{CLEAR} to the end of",
+            "your python command. Look at the beginning of the README for more details and an example."]
 
+CONFIG_RULES = {                                        # Variable: (M365Config attribute, exact length or None, extra checks)
+    "CLIENT_ID":        ("clientID", 36, None),
+    "AUTHORITY_URL":    ("authorityURL", 70, None),
+    "M365_DRIVE_ID":    ("driveID", 66, None),
+    "M365_FOLDER_PATH": ("folderPath", None, "slashes"),
+    "MFA_SECRET":       ("mfaSecret", None, "mfa"),
+    "M365_USERNAME":    ("username", None, None),
+    "M365_PASSWORD":    ("password", None, None),
+    "M365_FILENAME":    ("filename", None, None),
+}
 
-def msalConfigChecker(useMFA: bool, runDriveID: bool):
+TOKEN_KEYS = ("CLIENT_ID", "AUTHORITY_URL", "MFA_SECRET", "M365_USERNAME", "M365_PASSWORD")     # Needed to log in and generate a token
+DRIVE_KEYS = TOKEN_KEYS + ("M365_DRIVE_ID",)                                                    # Needed for anything on the drive
+FOLDER_KEYS = DRIVE_KEYS + ("M365_FOLDER_PATH",)                                                # Needed for anything in the folder
+FILE_KEYS = tuple(CONFIG_RULES)                                                                 # Needed to download/upload the file
+
+
+
+@dataclasses.dataclass(frozen=True)
+class M365Config:
+    """
+    Class holding every msal_config.env variable for one profile. It is
+    immutable so it can be shared between threads and handed to every
+    function, and the two secrets are left out of its repr() so it can't leak
+    them into logs. Variables that weren't needed (and so weren't checked) are
+    empty strings.
+    """
+    clientID: str = ""
+    authorityURL: str = ""
+    driveID: str = ""
+    folderPath: str = ""
+    filename: str = ""
+    mfaSecret: str = dataclasses.field(default="", repr=False)
+    username: str = ""
+    password: str = dataclasses.field(default="", repr=False)
+    profile: str = ""
+
+
+
+def configPath() -> Path:
+    """
+    Function returns the path msal_config.env is expected at, which is the
+    directory the script is ran from.
+    """
+    return Path(f"{os.getcwd()}/msal_config.env")       # Converting into proper path for whatever OS the script is on
+
+
+
+def listProfiles(values: dict) -> list:
+    """
+    Function returns the name of every profile in values, found from the
+    variables prefixed with "PROFILE__".
+    """
+    return sorted({key.split("__", 1)[0] for key in values if "__" in key and key.split("__", 1)[1] in CONFIG_RULES})
+
+
+
+def profileSources(values: dict, profile: str = None) -> dict:
+    """
+    Function returns which variable in values supplies each msal_config.env
+    variable for a profile, such as "ARCHIVE__M365_FOLDER_PATH" or the plain
+    "CLIENT_ID" it falls back on. A variable that is missing entirely is named
+    with the profile's prefix, since that is where it would be added.
+    """
+    if not profile:
+        return {key: key for key in CONFIG_RULES}
+    return {key: key if f"{profile}__{key}" not in values and key in values else f"{profile}__{key}" for key in CONFIG_RULES}
+
+
+
+def profileValues(values: dict, profile: str = None) -> dict:
     """
-    Function to check all variables in the msal_config.env file to make sure they
+    Function picks out every msal_config.env variable for a profile. A
+    profile's prefixed variable wins over the plain one, so variables every
+    profile shares (such as CLIENT_ID) only need to be written once. Variables
+    that are missing entirely are left as None.
+    """
+    return {key: values.get(source) for key, source in profileSources(values, profile).items()}
+
+
+
+def msalConfigChecker(rawConfig: dict, useMFA: bool, required: tuple, sources: dict = None) -> bool:
+    """
+    Function to check the variables in the msal_config.env file to make sure they
     are not blank, and if it is a variable that should be a certain length, checks
-    to make sure that variable is at the proper length.
+    to make sure that variable is at the proper length. Every check is driven by
+    CONFIG_RULES, only checking the variables listed in required.
 
     Parameters
     ----------
+    rawConfig : dict
+        The variables returned by profileValues().
     useMFA : bool
         A boolean variable that is set at script runtime with a flag. Determines
         if MFA script procedures will be ran. By default this is set to True.
         If set to False, the MFA_SECRET variable is ignored in this function.
-    runDriveID : bool
-        A boolean variable that is set at script runtime with a flag. Determines
-        if the script will only attempt to find drive_id's. By default this is
-        set to False. If set to True, this function will only check the 
-        msal_config.env variables needed to generate a token.
+    required : tuple of str
+        The variables the script needs, such as TOKEN_KEYS or FILE_KEYS.
+    sources : dict, optional
+        The variable names returned by profileSources(), so problems are
+        reported under the name actually written in msal_config.env. By
+        default the plain names are used.
 
     Returns
     -------
@@ -46,134 +136,69 @@ def msalConfigChecker(useMFA: bool, runDriveID: bool):
     """
     emptyVars = False
 
-    if runDriveID:
-        try:
-            if len(os.environ.get("CLIENT_ID")) == 0 or len(os.environ.get("CLIENT_ID")) != 36:
-                print(f"\n{RED}CLIENT_ID{CLEAR} variable empty or improper length")
-                print(f"CLIENT_ID Length: {RED}{len(os.environ.get('CLIENT_ID'))}{CLEAR}")
-                print(f"Proper Length: {GREEN}36{CLEAR}")
-                emptyVars = True
-        except:
-            print(f"\n{RED}CLIENT_ID{CLEAR} variable missing from msal_config.env")
-            emptyVars = True
-        try:
-            if len(os.environ.get("AUTHORITY_URL")) == 0 or len(os.environ.get("AUTHORITY_URL")) != 70:
-                print(f"\n{RED}AUTHORITY_URL{CLEAR} variable empty or improper length")
-                print(f"AUTHORITY_URL Length: {RED}{len(os.environ.get('AUTHORITY_URL'))}{CLEAR}")
-                print(f"Proper Length: {GREEN}70{CLEAR}")
-                emptyVars = True
-        except:
-            print(f"\n{RED}AUTHORITY_URL{CLEAR} variable missing from msal_config.env")
-            emptyVars = True
-        try:
-            if len(os.environ.get("MFA_SECRET")) == 0 and useMFA:
-                print(f"\n{RED}MFA_SECRET{CLEAR} variable empty")
-                print(f"If you wish to run the script without MFA, add the flag {GREEN}-N{CLEAR} or {GREEN}--nomfa{CLEAR} to the end of")
-                print("your python command. Look at the beginning of the README for more details and an example.")
-                emptyVars = True
-        except:
-            if useMFA:                                  # If MFA should still be used, report the missing variable
-                print(f"\n{RED}MFA_SECRET{CLEAR} variable missing from msal_config.env")
-                emptyVars = True
-        try:
-            if len(os.environ.get("M365_USERNAME")) == 0:
-                print(f"\n{RED}M365_USERNAME{CLEAR} variable empty")
-                emptyVars = True
-        except:
-            print(f"\n{RED}M365_USERNAME{CLEAR} variable missing from msal_config.env")
-            emptyVars = True
-        try:
-            if len(os.environ.get("M365_PASSWORD")) == 0:
-                print(f"\n{RED}M365_PASSWORD{CLEAR} variable empty")
-                emptyVars = True
-        except:
-            print(f"\n{RED}M365_PASSWORD{CLEAR} variable missing from msal_config.env")
-            emptyVars = True
-        
-        return emptyVars
-
-    try:
-        if len(os.environ.get("CLIENT_ID")) == 0 or len(os.environ.get("CLIENT_ID")) != 36:
-            print(f"\n{RED}CLIENT_ID{CLEAR} variable empty or improper length")
-            print(f"CLIENT_ID Length: {RED}{len(os.environ.get('CLIENT_ID'))}{CLEAR}")
-            print(f"Proper Length: {GREEN}36{CLEAR}")
-            emptyVars = True
-    except:
-        print(f"\n{RED}CLIENT_ID{CLEAR} variable missing from msal_config.env")
-        emptyVars = True
-    try:
-        if len(os.environ.get("AUTHORITY_URL")) == 0 or len(os.environ.get("AUTHORITY_URL")) != 70:
-            print(f"\n{RED}AUTHORITY_URL{CLEAR} variable empty or improper length")
-            print(f"AUTHORITY_URL Length: {RED}{len(os.environ.get('AUTHORITY_URL'))}{CLEAR}")
-            print(f"Proper Length: {GREEN}70{CLEAR}")
-            emptyVars = True
-    except:
-        print(f"\n{RED}AUTHORITY_URL{CLEAR} variable missing from msal_config.env")
-        emptyVars = True
-    try:
-        if len(os.environ.get("M365_DRIVE_ID")) == 0 or len(os.environ.get("M365_DRIVE_ID")) != 66:
-            print(f"\n{RED}M365_DRIVE_ID{CLEAR} variable empty or improper length")
-            print(f"M365_DRIVE_ID Length: {RED}{len(os.environ.get('M365_DRIVE_ID'))}{CLEAR}")
-            print(f"Proper Length: {GREEN}66{CLEAR}")
-            emptyVars = True
-    except:
-        print(f"\n{RED}M365_DRIVE_ID{CLEAR} variable missing from msal_config.env")
-        emptyVars = True
-    try:
-        if len(os.environ.get("M365_FOLDER_PATH")) == 0:
-            print(f"\n{RED}M365_FOLDER_PATH{CLEAR} variable empty")
-            emptyVars = True
-        elif os.environ.get("M365_FOLDER_PATH")[0] == "/":  # Logic for starting slash in folder path
-            badSubstring = os.environ.get("M365_FOLDER_PATH")[0:1]
-            goodSubstring = os.environ.get("M365_FOLDER_PATH")[1:]
-            print(f"\n{RED}M365_FOLDER_PATH{CLEAR} variable has a forward slash at the start, remove the red text below")
-            print(f"{REDHIGHLIGHT}{badSubstring}{CLEAR}{goodSubstring}")
-            emptyVars = True
-        elif os.environ.get("M365_FOLDER_PATH")[-1] == "/": # Logic for ending slash in folder path
-            badSubstring = os.environ.get("M365_FOLDER_PATH")[-1]
-            goodSubstring = os.environ.get("M365_FOLDER_PATH")[0:-1]
-            print(f"\n{RED}M365_FOLDER_PATH{CLEAR} variable has a forward slash at the end, remove the red text below")
-            print(f"{goodSubstring}{REDHIGHLIGHT}{badSubstring}{CLEAR}")
-            emptyVars = True
-    except:
-        print(f"\n{RED}M365_FOLDER_PATH{CLEAR} variable missing from msal_config.env")
-        emptyVars = True
-    try:
-        if len(os.environ.get("MFA_SECRET")) == 0 and useMFA:
-            print(f"\n{RED}MFA_SECRET{CLEAR} variable empty")
-            print(f"If you wish to run the script without MFA, add the flag {GREEN}-N{CLEAR} or {GREEN}--nomfa{CLEAR} to the end of")
-            print("your python command. Look at the beginning of the README for more details and an example.")
+    for key, (attribute, length, extra) in CONFIG_RULES.items():
+        value = rawConfig[key]
+        if key not in required or (extra == "mfa" and not useMFA):  # If MFA isn't being used, the secret is ignored
+            continue
+        name = sources[key] if sources else key         # Such as ARCHIVE__M365_FOLDER_PATH when a profile supplied it
+
+        if value is None:
+            print(f"\n{RED}{name}{CLEAR} variable missing from msal_config.env")
             emptyVars = True
-    except:
-        if useMFA:                                      # If MFA should still be used, report the missing variable
-            print(f"\n{RED}MFA_SECRET{CLEAR} variable missing from msal_config.env")
+        elif length is not None and len(value) != length:
+            print(f"\n{RED}{name}{CLEAR} variable empty or improper length")
+            print(f"{name} Length: {RED}{len(value)}{CLEAR}")
+            print(f"Proper Length: {GREEN}{length}{CLEAR}")
             emptyVars = True
-    try:
-        if len(os.environ.get("M365_USERNAME")) == 0:
-            print(f"\n{RED}M365_USERNAME{CLEAR} variable empty")
+        elif len(value) == 0:
+            print(f"\n{RED}{name}{CLEAR} variable empty")
+            if extra == "mfa":
+                print("\n".join(MFA_HINT))
             emptyVars = True
-    except:
-        print(f"\n{RED}M365_USERNAME{CLEAR} variable missing from msal_config.env")
-        emptyVars = True
-    try:
-        if len(os.environ.get("M365_PASSWORD")) == 0:
-            print(f"\n{RED}M365_PASSWORD{CLEAR} variable empty")
+        elif extra == "slashes" and value[0] == "/":    # Logic for starting slash in folder path
+            print(f"\n{RED}{name}{CLEAR} variable has a forward slash at the start, remove the red text below")
+            print(f"{REDHIGHLIGHT}{value[0:1]}{CLEAR}{value[1:]}")
             emptyVars = True
-    except:
-        print(f"\n{RED}M365_PASSWORD{CLEAR} variable missing from msal_config.env")
-        emptyVars = True
-    try:
-        if len(os.environ.get("M365_FILENAME")) == 0:
-            print(f"\n{RED}M365_FILENAME{CLEAR} variable empty")
+        elif extra == "slashes" and value[-1] == "/":   # Logic for ending slash in folder path
+            print(f"\n{RED}{name}{CLEAR} variable has a forward slash at the end, remove the red text below")
+            print(f"{value[0:-1]}{REDHIGHLIGHT}{value[-1]}{CLEAR}")
             emptyVars = True
-    except:
-        print(f"\n{RED}M365_FILENAME{CLEAR} variable missing from msal_config.env")
-        emptyVars = True
-    
+
     return emptyVars
 
 
 
+def loadConfig(useMFA: bool, required: tuple, profile: str = None):
+    """
+    Function reads msal_config.env (plus any of its variables already set in
+    the environment, which win like they did with load_dotenv()) without
+    changing os.environ, and checks the variables in required.
+
+    Returns
+    -------
+    config : M365Config or None
+        The checked config, or None if any variable was misconfigured. The
+        problems have already been printed.
+
+    Raises
+    ------
+    SystemExit
+        Exits the script if profile isn't in msal_config.env.
+    """
+    values = {**dotenv_values(configPath()), **os.environ}
+    if profile and profile not in listProfiles(values):
+        print(f"\nProfile {RED}{profile}{CLEAR} was not found in msal_config.env")
+        print(f"Profiles found: {GREEN}{', '.join(listProfiles(values)) or 'none'}{CLEAR}")
+        print(f"Add variables such as {GREEN}{profile}__M365_DRIVE_ID{CLEAR} to msal_config.env to create it.\n")
+        raise SystemExit(0)
+
+    rawConfig = profileValues(values, profile)
+    if msalConfigChecker(rawConfig, useMFA, required, profileSources(values, profile)):
+        return None
+    return M365Config(profile=profile or "", **{attribute: rawConfig[key] or "" for key, (attribute, length, extra) in CONFIG_RULES.items()})
+
+
+
 def msalConfigCreator():
     """
     Function creates a blank msal_config.env file with all the necessary
@@ -191,7 +216,7 @@ def msalConfigCreator():
 
 
 
-def dotenvInit(useMFA: bool, runDriveID: bool):
+def dotenvInit(useMFA: bool, required: tuple = FILE_KEYS, profile: str = None) -> M365Config:
     """
     Function loads the msal_config.env file that should be created during the
     setup process. If it does not exist, it will ask the user if they want to
@@ -206,10 +231,18 @@ def dotenvInit(useMFA: bool, runDriveID: bool):
         A boolean variable that is set at script runtime with a flag. Determines
         if MFA script procedures will be ran. By default this is set to True.
         Passed to msalConfigChecker() in this function.
-    runDriveID : bool
-        A boolean variable that is set at script runtime with a flag. Determines
-        if the script will only attempt to find drive_id's. By default this is
-        set to False. Passed to msalConfigChecker() in this function.
+    required : tuple of str, optional
+        The variables the script needs. By default this is FILE_KEYS (every
+        variable), while scripts that only need to log in pass TOKEN_KEYS.
+    profile : str, optional
+        The profile to use, set at script runtime with the -P or --profile args.
+        By default this is None, which uses the variables without a prefix.
+
+    Returns
+    -------
+    config : M365Config
+        The checked msal_config.env variables, passed to every function that
+        needs them.
 
     Raises
     ------
@@ -218,18 +251,18 @@ def dotenvInit(useMFA: bool, runDriveID: bool):
         variables within the file are blank or misconfigured.
     """
     print("\nChecking msal_config.env file setup...")
-    stringPath = f"{os.getcwd()}/msal_config.env"
-    dotenvPath = Path(stringPath)                       # Converting into proper path for whatever OS the script is on
+    dotenvPath = configPath()
     
-    if Path(stringPath).exists():                       # If the file exists
-        load_dotenv(dotenvPath)                         # Loading the environment variables
+    if dotenvPath.exists():                             # If the file exists
+        config = loadConfig(useMFA, required, profile)  # Loading and checking the variables
 
-        if msalConfigChecker(useMFA, runDriveID):       # Checking to see if vars are populated
+        if config is None:                              # Checking to see if vars are populated
             print("\nOne or more of your variables in msal_config.env is empty, misconfigured, or missing.")
             print("Add/fix the data listed above in red and run the script again.\n")
             raise SystemExit(0)
         else:
             print(f"{GREEN}Your msal_config.env file appears to be properly configured!{CLEAR}\n")
+            return config
     else:
         print("You do not have msal_config.env in the same directory as your script")
         print("or you are executing the Python code from a different directory than")
@@ -0,0 +1,294 @@
+# Script by: DarkSplash
+# Last edited: 2026-10-19
+
+# This is one of the dependency scripts for the downloader/uploader script.
+# This specific script keeps a local SQLite copy of a drive's file tree (IDs,
+# paths, sizes, eTags, hashes, and modification times) so that path lookups
+# and searches don't need a Microsoft Graph call each. The index is kept up to
+# date with Graph's delta API, which only returns what changed since last sync.
+
+import sqlite3
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id              TEXT PRIMARY KEY,
+    drive_id        TEXT NOT NULL,
+    parent_id       TEXT,
+    name            TEXT NOT NULL,
+    path            TEXT NOT NULL,
+    is_folder       INTEGER NOT NULL,
+    size            INTEGER,
+    etag            TEXT,
+    quick_xor_hash  TEXT,
+    sha1_hash       TEXT,
+    sha256_hash     TEXT,
+    modified        TEXT
+);
+CREATE INDEX IF NOT EXISTS items_drive_path ON items (drive_id, path);
+CREATE INDEX IF NOT EXISTS items_parent ON items (parent_id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    drive_id        TEXT PRIMARY KEY,
+    delta_link      TEXT
+);
+"""
+DELTA_SELECT = "id,name,size,eTag,file,folder,root,deleted,parentReference,lastModifiedDateTime"
+
+
+
+def openIndex(indexPath: str) -> sqlite3.Connection:
+    """
+    Function opens (and creates if needed) the SQLite index database.
+
+    Parameters
+    ----------
+    indexPath : str
+        Path to the SQLite database file, such as "drive_index.db".
+
+    Returns
+    -------
+    connection : sqlite3.Connection
+        An open connection to the index with rows returned as sqlite3.Row so
+        they can be turned into dicts.
+    """
+    connection = sqlite3.connect(indexPath)
+    connection.row_factory = sqlite3.Row
+    connection.executescript(INDEX_SCHEMA)
+    return connection
+
+
+
+def prefixRange(prefix: str):
+    """
+    Function turns a folder path into the range of paths underneath it. Every
+    path starting with "prefix/" sorts between "prefix/" and "prefix0" since
+    "0" is the character right after "/", which lets SQLite use the path index
+    instead of scanning the whole table like a LIKE query would.
+    """
+    return f"{prefix}/", f"{prefix}0"
+
+
+
+def itemPath(connection: sqlite3.Connection, item: dict):
+    """
+    Function works out an item's path relative to the drive root (without a
+    starting slash, the root itself being "") from its parent's path in the
+    index. Returns None if the parent hasn't been indexed yet, since delta
+    responses don't include parentReference paths to fall back on.
+    """
+    if "root" in item:
+        return ""
+
+    parent = connection.execute("SELECT path FROM items WHERE id = ?", (item.get("parentReference", {}).get("id"),)).fetchone()
+    if parent is None:
+        return None
+    return f"{parent['path']}/{item['name']}" if parent["path"] else item["name"]
+
+
+
+def updateChildPaths(connection: sqlite3.Connection, folderID: str, folderPath: str):
+    """
+    Function rewrites the path of everything under a folder by following
+    parent IDs down from it. This fixes children that were indexed before
+    their folder was, as well as everything under a folder that was renamed
+    or moved, since Graph doesn't always send the folder's children again.
+    """
+    pending = [(folderID, folderPath)]
+    seen = {folderID}                                   # Parent IDs can briefly loop while a move is half applied
+    while pending:
+        parentID, parentPath = pending.pop()
+        for child in connection.execute("SELECT id, name, is_folder FROM items WHERE parent_id = ?", (parentID,)).fetchall():
+            if child["id"] in seen:
+                continue
+            seen.add(child["id"])
+            childPath = f"{parentPath}/{child['name']}" if parentPath else child["name"]
+            connection.execute("UPDATE items SET path = ? WHERE id = ?", (childPath, child["id"]))
+            if child["is_folder"]:
+                pending.append((child["id"], childPath))
+
+
+
+def removeItem(connection: sqlite3.Connection, driveID: str, itemID: str):
+    """
+    Function removes an item and, if it was a folder, everything under it.
+    """
+    row = connection.execute("SELECT path, is_folder FROM items WHERE id = ?", (itemID,)).fetchone()
+    if row is None:
+        return
+    if row["is_folder"]:
+        low, high = prefixRange(row["path"])
+        connection.execute("DELETE FROM items WHERE drive_id = ? AND path >= ? AND path < ?", (driveID, low, high))
+    connection.execute("DELETE FROM items WHERE id = ?", (itemID,))
+
+
+
+def upsertItem(connection: sqlite3.Connection, driveID: str, item: dict):
+    """
+    Function inserts or updates one item from a delta response. If a folder
+    is new or its path changed, every path underneath it is rewritten as well.
+    An item whose parent hasn't been indexed yet is stored under its bare name
+    until the parent arrives and rewrites it.
+    """
+    path = itemPath(connection, item)
+    if path is None:
+        path = item.get("name", "")
+    hashes = item.get("file", {}).get("hashes", {})
+    isFolder = "folder" in item or "root" in item
+
+    old = connection.execute("SELECT path FROM items WHERE id = ?", (item["id"],)).fetchone()
+
+    connection.execute(
+        "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (item["id"], driveID, item.get("parentReference", {}).get("id"), item.get("name", ""), path,
+         int(isFolder), item.get("size"), item.get("eTag"),
+         hashes.get("quickXorHash"), hashes.get("sha1Hash"), hashes.get("sha256Hash"),
+         item.get("lastModifiedDateTime")))
+
+    if isFolder and (old is None or old["path"] != path):
+        updateChildPaths(connection, item["id"], path)
+
+
+
+def unresolvedCount(connection: sqlite3.Connection, driveID: str) -> int:
+    """
+    Function counts the items whose parent isn't in the index, meaning their
+    paths couldn't be worked out.
+    """
+    return connection.execute(
+        "SELECT COUNT(*) FROM items WHERE drive_id = ? AND parent_id IS NOT NULL AND parent_id NOT IN (SELECT id FROM items)",
+        (driveID,)).fetchone()[0]
+
+
+
+def syncIndex(tokenProvider, connection: sqlite3.Connection, driveID: str) -> int:
+    """
+    Function brings the index up to date with the drive using Graph's delta
+    API. The first sync pages through the whole drive, every sync after that
+    starts from the saved deltaLink and only receives what changed. All of the
+    changes are committed at once, so a failed sync leaves the index exactly
+    how it was before. If an incremental sync leaves items whose folder was
+    never returned, the drive is resynced from scratch instead.
+
+    Parameters
+    ----------
+    tokenProvider : token_generator.TokenProvider
+        The object returned by tokenGen(). Supplies the current (automatically
+        refreshed) token used for authentication with the Microsoft Graph API calls.
+    connection : sqlite3.Connection
+        The index connection returned by openIndex().
+    driveID : str
+        The drive to sync, normally the M365_DRIVE_ID variable.
+
+    Returns
+    -------
+    changes : int
+        How many items were added, updated, or removed.
+
+    Raises
+    ------
+    RuntimeError
+        If even a full sync leaves items whose folder is missing.
+    """
+    state = connection.execute("SELECT delta_link FROM sync_state WHERE drive_id = ?", (driveID,)).fetchone()
+    fullSync = f'https://graph.microsoft.com/v1.0/drives/{driveID}/root/delta?$select={DELTA_SELECT}'
+    url = state["delta_link"] if state is not None else fullSync
+    isFullSync = state is None
+    changes = 0
+
+    with connection:                                    # One transaction for the whole sync
+        while url:
+            result = tokenProvider.get(url)
+            if result.status_code == 410:               # Saved deltaLink expired, Graph wants a full resync
+                connection.execute("DELETE FROM items WHERE drive_id = ?", (driveID,))
+                url = fullSync
+                isFullSync = True
+                continue
+            result.raise_for_status()
+            resultJSON = result.json()
+
+            for item in resultJSON.get("value", []):
+                if "deleted" in item:
+                    removeItem(connection, driveID, item["id"])
+                else:
+                    upsertItem(connection, driveID, item)
+                changes += 1
+
+            url = resultJSON.get("@odata.nextLink")     # More pages left if there is a nextLink
+            if url is None and unresolvedCount(connection, driveID):
+                if isFullSync:
+                    raise RuntimeError(f"Delta sync of drive {driveID} returned items whose folder is missing")
+                connection.execute("DELETE FROM items WHERE drive_id = ?", (driveID,))
+                url = fullSync
+                isFullSync = True
+            elif url is None:
+                connection.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?)", (driveID, resultJSON.get("@odata.deltaLink")))
+
+    return changes
+
+
+
+def lookupPath(connection: sqlite3.Connection, driveID: str, path: str):
+    """
+    Function looks up a single item by its path relative to the drive root
+    (the same format as M365_FOLDER_PATH). Returns the item as a dict, or None
+    if there is nothing at that path.
+    """
+    row = connection.execute("SELECT * FROM items WHERE drive_id = ? AND path = ?", (driveID, path.strip("/"))).fetchone()
+    return dict(row) if row is not None else None
+
+
+
+def listPrefix(connection: sqlite3.Connection, driveID: str, prefix: str, recursive: bool = False) -> list:
+    """
+    Function lists the items inside a folder, or everything under it at any
+    depth if recursive is True. An empty prefix lists from the drive root.
+    """
+    folder = lookupPath(connection, driveID, prefix)
+    if folder is None:
+        return []
+    if not recursive:
+        rows = connection.execute("SELECT * FROM items WHERE parent_id = ? ORDER BY path", (folder["id"],))
+    elif folder["path"] == "":
+        rows = connection.execute("SELECT * FROM items WHERE drive_id = ? AND path != '' ORDER BY path", (driveID,))
+    else:
+        low, high = prefixRange(folder["path"])
+        rows = connection.execute("SELECT * FROM items WHERE drive_id = ? AND path >= ? AND path < ? ORDER BY path", (driveID, low, high))
+    return [dict(row) for row in rows]
+
+
+
+def findItems(connection: sqlite3.Connection, driveID: str, pattern: str = None, minSize: int = None, maxSize: int = None) -> list:
+    """
+    Function searches the whole index for files. Any filter left as None is
+    ignored.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        The index connection returned by openIndex().
+    driveID : str
+        The drive to search.
+    pattern : str, optional
+        A case sensitive glob matched against the full path, such as
+        "Reports/*.xlsx". Note that "*" also matches across folders.
+    minSize : int, optional
+        Smallest file size in bytes to return.
+    maxSize : int, optional
+        Largest file size in bytes to return.
+
+    Returns
+    -------
+    items : list of dict
+        Every matching file, sorted by path.
+    """
+    query = "SELECT * FROM items WHERE drive_id = ? AND is_folder = 0"
+    params = [driveID]
+    if pattern is not None:
+        query += " AND path GLOB ?"
+        params.append(pattern.strip("/"))
+    if minSize is not None:
+        query += " AND size >= ?"
+        params.append(minSize)
+    if maxSize is not None:
+        query += " AND size <= ?"
+        params.append(maxSize)
+    return [dict(row) for row in connection.execute(query + " ORDER BY path", params)]
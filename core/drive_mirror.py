@@ -0,0 +1,316 @@
+# Script by: DarkSplash
+# Last edited: 2026-10-19
+
+# This is one of the dependency scripts for the mirror script.
+# This specific script mirrors a SharePoint/OneDrive/Teams folder tree to a local
+# directory. The work can be split between several PCs: each one is given a shard
+# index and shard count, and only downloads the items whose hashed ID lands in its
+# shard. Progress is saved to a checkpoint file per shard, so a shard that failed
+# on one PC can be picked back up on another one that can see the same file.
+
+import core.bandwidth_limiter as bandwidth_limiter      # Script to share a bandwidth limit between transfers
+import core.content_cache as content_cache              # Script for the shared local cache of downloaded files
+import core.drive_index as drive_index                  # Script that keeps the local SQLite index of the drive
+
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+import urllib
+import uuid
+
+CHECKPOINT_INTERVAL = 30                                # Most seconds between checkpoint saves while mirroring
+DOWNLOAD_CHUNK_SIZE = 1048576                           # 1 MiB, the most of a file held in memory at once
+
+
+
+def shardOf(itemID: str, shardCount: int) -> int:
+    """
+    Function returns which shard an item belongs to. The item ID is hashed
+    with SHA-1 instead of Python's hash() since that changes between runs,
+    and every PC has to agree on the same shard for the same item.
+    """
+    return int(hashlib.sha1(itemID.encode()).hexdigest()[:16], 16) % shardCount
+
+
+
+def listTree(tokenProvider, driveID: str, folderPath: str) -> list:
+    """
+    Function lists every file under folderPath at any depth with the Graph
+    "children" API, following every nextLink page.
+
+    Parameters
+    ----------
+    tokenProvider : token_generator.TokenProvider
+        The object returned by tokenGen(). Supplies the current (automatically
+        refreshed) token used for authentication with the Microsoft Graph API calls.
+    driveID : str
+        The drive to list.
+    folderPath : str
+        The folder to list, relative to the drive root ("" for the whole drive).
+
+    Returns
+    -------
+    items : list of dict
+        Each file's Graph JSON with an added "path" key holding its path
+        relative to folderPath.
+    """
+    items = []
+    folders = [""]
+    while folders:
+        relativeDir = folders.pop()
+        fullPath = "/".join(part for part in (folderPath.strip("/"), relativeDir) if part)
+        url = (f'https://graph.microsoft.com/v1.0/drives/{driveID}/root:/{urllib.parse.quote(fullPath)}:/children' if fullPath
+               else f'https://graph.microsoft.com/v1.0/drives/{driveID}/root/children')
+        url += "?$select=id,name,size,eTag,file,folder&$top=999"
+        while url:
+            result = tokenProvider.get(url)
+            result.raise_for_status()
+            resultJSON = result.json()
+            for item in resultJSON["value"]:
+                item["path"] = f"{relativeDir}/{item['name']}" if relativeDir else item["name"]
+                if "folder" in item:
+                    folders.append(item["path"])
+                else:
+                    items.append(item)
+            url = resultJSON.get("@odata.nextLink")
+    return items
+
+
+
+def listIndexedTree(connection, driveID: str, folderPath: str) -> list:
+    """
+    Function lists every file under folderPath from a drive_index database
+    instead of Graph, in the same format as listTree(). No network is used,
+    so the index should be synced first.
+    """
+    folderPath = folderPath.strip("/")
+    items = []
+    for row in drive_index.listPrefix(connection, driveID, folderPath, recursive=True):
+        if row["is_folder"]:
+            continue
+        hashes = {key: row[column] for key, column in (("quickXorHash", "quick_xor_hash"), ("sha1Hash", "sha1_hash"), ("sha256Hash", "sha256_hash"))
+                  if row[column]}
+        items.append({"id": row["id"], "name": row["name"], "size": row["size"], "eTag": row["etag"], "file": {"hashes": hashes},
+                      "path": row["path"][len(folderPath) + 1:] if folderPath else row["path"]})
+    return items
+
+
+
+class ShardCheckpoint:
+    """
+    Class for one shard's checkpoint file, which records the eTag of every
+    item the shard has finished mirroring. The file is JSON so it can be
+    copied between PCs, and is saved by writing a temporary file and renaming
+    it so a crash never leaves a half written checkpoint. A lock file next to
+    it stops two PCs from running the same shard at once.
+
+    Parameters
+    ----------
+    checkpointDir : str
+        Directory every shard's checkpoint is kept in. To resume a shard on a
+        different PC, this should be a shared folder or copied over.
+    driveID : str
+        The drive being mirrored.
+    folderPath : str
+        The folder being mirrored.
+    shardIndex : int
+        This shard's number, from 0 to shardCount - 1.
+    shardCount : int
+        How many shards the work is split into.
+    """
+    def __init__(self, checkpointDir: str, driveID: str, folderPath: str, shardIndex: int, shardCount: int):
+        os.makedirs(checkpointDir, exist_ok=True)
+        self.path = os.path.join(checkpointDir, f"shard-{shardIndex:04d}-of-{shardCount:04d}.json")
+        self.lockPath = self.path + ".lock"
+        self.header = {"driveID": driveID, "folderPath": folderPath, "shardIndex": shardIndex, "shardCount": shardCount}
+        self.lock = threading.Lock()
+        self.ownerToken = None                          # Set by claim(), marks the lock file as this run's
+        self.completed = {}
+        self.lastSave = time.monotonic()
+
+        if os.path.exists(self.path):
+            with open(self.path) as file:
+                saved = json.load(file)
+            if {key: saved.get(key) for key in self.header} != self.header:
+                raise ValueError(f"Checkpoint \"{self.path}\" belongs to a different mirror: {saved}")
+            self.completed = saved["completed"]
+
+
+    def claim(self, takeover: bool = False):
+        """
+        Function creates the shard's lock file holding a random owner token
+        along with this PC's name. If the lock already exists, another PC is
+        running (or crashed while running) this shard, and it is only taken
+        over if takeover is True.
+
+        Raises
+        ------
+        FileExistsError
+            If the shard is locked and takeover is False.
+        """
+        flags = os.O_CREAT | os.O_WRONLY | (os.O_TRUNC if takeover else os.O_EXCL)
+        fd = os.open(self.lockPath, flags)
+        ownerToken = uuid.uuid4().hex
+        with os.fdopen(fd, "w") as file:
+            file.write(f"{ownerToken} {socket.gethostname()} {os.getpid()} {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+        self.ownerToken = ownerToken
+
+
+    def release(self):
+        """
+        Function removes the shard's lock file, but only if it still holds
+        this run's owner token. If another PC took the shard over with
+        --takeover in the meantime, its lock is left alone.
+        """
+        if self.ownerToken is None:
+            return
+        try:
+            with open(self.lockPath) as file:
+                owner = file.read().split(" ", 1)[0]
+            if owner == self.ownerToken:
+                os.remove(self.lockPath)
+        except FileNotFoundError:
+            pass
+        self.ownerToken = None
+
+
+    def isDone(self, item: dict) -> bool:
+        """
+        Function returns True if item was already mirrored and hasn't changed
+        since.
+        """
+        with self.lock:
+            return self.completed.get(item["id"]) == item.get("eTag")
+
+
+    def markDone(self, item: dict):
+        """
+        Function records item as mirrored, saving the checkpoint if it hasn't
+        been saved in CHECKPOINT_INTERVAL seconds.
+        """
+        with self.lock:
+            self.completed[item["id"]] = item.get("eTag")
+            if time.monotonic() - self.lastSave >= CHECKPOINT_INTERVAL:
+                self.saveLocked()
+
+
+    def save(self):
+        """
+        Function writes the checkpoint to disk.
+        """
+        with self.lock:
+            self.saveLocked()
+
+
+    def saveLocked(self):
+        """
+        Function writes the checkpoint to a temporary file and renames it over
+        the old one. Must be called with the lock held.
+        """
+        tmpPath = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmpPath, "w") as file:
+            json.dump({**self.header, "completed": self.completed}, file)
+        os.replace(tmpPath, self.path)
+        self.lastSave = time.monotonic()
+
+
+
+def downloadItem(tokenProvider, driveID: str, item: dict, target: str, cache=None, limiter=None, priority: int = bandwidth_limiter.PRIORITY_NORMAL):
+    """
+    Function downloads one item to target. The file is requested through the
+    item's /content URL, which redirects to a fresh pre-authenticated download
+    URL, so long running mirrors never use an expired one. The file is written
+    to target + ".part" first and renamed once complete.
+
+    Parameters
+    ----------
+    tokenProvider : token_generator.TokenProvider
+        The object returned by tokenGen(). Supplies the current (automatically
+        refreshed) token used for authentication with the Microsoft Graph API calls.
+    driveID : str
+        The drive the item is on.
+    item : dict
+        The item's JSON from listTree() or listIndexedTree().
+    target : str
+        Where the file is saved on this PC.
+    cache : content_cache.ContentCache, optional
+        A shared content cache to link the file from or add it to.
+    limiter : bandwidth_limiter.BandwidthLimiter, optional
+        Shared bandwidth limit the download is read through.
+    priority : int, optional
+        The download's priority when sharing the limiter.
+    """
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    key = content_cache.cacheKey(item)
+    if cache is not None and cache.materialize(key, target):
+        return
+
+    chunkSize = DOWNLOAD_CHUNK_SIZE if limiter is None else bandwidth_limiter.THROTTLE_SLICE
+    with tokenProvider.get(f'https://graph.microsoft.com/v1.0/drives/{driveID}/items/{item["id"]}/content', stream=True) as download:
+        download.raise_for_status()
+        chunks = bandwidth_limiter.throttleChunks(limiter, download.iter_content(chunk_size=chunkSize), priority)
+        if cache is not None:
+            cache.put(key, chunks, target)
+            return
+        with open(target + ".part", "wb") as file:
+            for chunk in chunks:
+                file.write(chunk)
+    content_cache.removeTarget(target)                  # Windows can't replace read-only files left by older cached mirrors
+    os.replace(target + ".part", target)
+
+
+
+def mirrorShard(tokenProvider, driveID: str, items: list, destDir: str, checkpoint: ShardCheckpoint, transferQueue,
+                cache=None, limiter=None) -> tuple:
+    """
+    Function downloads every item in this checkpoint's shard that isn't
+    already marked done, queueing small files ahead of large ones.
+
+    Parameters
+    ----------
+    tokenProvider : token_generator.TokenProvider
+        The object returned by tokenGen(). Supplies the current (automatically
+        refreshed) token used for authentication with the Microsoft Graph API calls.
+    driveID : str
+        The drive being mirrored.
+    items : list of dict
+        Every file in the mirrored folder, from listTree() or listIndexedTree().
+        Items belonging to other shards are skipped.
+    destDir : str
+        The local directory the folder is mirrored into.
+    checkpoint : ShardCheckpoint
+        This shard's checkpoint.
+    transferQueue : bandwidth_limiter.TransferQueue
+        The threads the downloads run on.
+    cache : content_cache.ContentCache, optional
+        A shared content cache.
+    limiter : bandwidth_limiter.BandwidthLimiter, optional
+        Shared bandwidth limit.
+
+    Returns
+    -------
+    counts : tuple of int
+        How many of the shard's items were (downloaded, already done, failed).
+    """
+    shardIndex, shardCount = checkpoint.header["shardIndex"], checkpoint.header["shardCount"]
+    shardItems = [item for item in items if shardOf(item["id"], shardCount) == shardIndex]
+    pending = [item for item in shardItems if not checkpoint.isDone(item)]
+
+    def mirrorItem(item):
+        downloadItem(tokenProvider, driveID, item, os.path.join(destDir, *item["path"].split("/")), cache, limiter)
+        checkpoint.markDone(item)
+
+    futures = [(item, transferQueue.submit(mirrorItem, item, sortKey=item.get("size") or 0)) for item in pending]
+    failed = 0
+    for item, future in futures:
+        try:
+            future.result()
+        except Exception as e:
+            print(f"\nUnable to mirror \"{item['path']}\": {e}")
+            failed += 1
+    checkpoint.save()
+
+    return len(pending) - failed, len(shardItems) - len(pending), failed
@@ -0,0 +1,267 @@
+# Script by: DarkSplash
+# Last edited: 2026-10-19
+
+# This is one of the dependency scripts for the mover script.
+# This specific script copies and moves items inside of SharePoint/OneDrive/Teams
+# without the file ever leaving Microsoft's servers. Requests are grouped into
+# Graph's JSON batching API (20 requests per HTTP call), and copies, which Graph
+# runs in the background, are tracked by polling their async monitor URLs.
+
+import requests
+import time
+import urllib
+
+GRAPH_BATCH_URL = "https://graph.microsoft.com/v1.0/$batch"
+GRAPH_BATCH_LIMIT = 20                                  # Most requests Graph allows in one batch
+MAX_RETRIES = 5                                         # How many times a throttled (429/503) request is retried
+MONITOR_TIMEOUT = 3600                                  # Most seconds to wait on copy monitors before marking them failed
+
+
+
+def retryDelay(retryAfter, default: int) -> int:
+    """
+    Function turns a Retry-After header into a number of seconds to wait.
+    Retry-After can also be an HTTP-date, which (like a missing header) falls
+    back to default.
+    """
+    try:
+        return max(int(retryAfter), 0)
+    except (TypeError, ValueError):
+        return default
+
+
+
+def batchRequests(tokenProvider, requestList: list) -> list:
+    """
+    Function sends a list of Graph requests through the JSON batching API,
+    GRAPH_BATCH_LIMIT requests at a time. Any request Graph throttles is sent
+    again in the next batch after waiting for its Retry-After time.
+
+    Parameters
+    ----------
+    tokenProvider : token_generator.TokenProvider
+        The object returned by tokenGen(). Supplies the current (automatically
+        refreshed) token used for authentication with the Microsoft Graph API calls.
+    requestList : list of dict
+        Each request is a dict with a "method", a "url" relative to the Graph
+        v1.0 endpoint (such as "/drives/{id}/items/{id}"), and an optional
+        "body" dict.
+
+    Returns
+    -------
+    responses : list of dict
+        One batch response per request in the same order as requestList, each
+        with a "status", "headers" (with lowercase names), and "body".
+    """
+    responses = [None] * len(requestList)
+    pending = list(range(len(requestList)))
+    retries = 0
+
+    while pending:
+        batch, pending = pending[:GRAPH_BATCH_LIMIT], pending[GRAPH_BATCH_LIMIT:]
+        batchJSON = {"requests": []}
+        for index in batch:
+            request = {"id": str(index), "method": requestList[index]["method"], "url": requestList[index]["url"]}
+            if "body" in requestList[index]:
+                request["body"] = requestList[index]["body"]
+                request["headers"] = {"Content-Type": "application/json"}
+            batchJSON["requests"].append(request)
+
+        result = tokenProvider.post(GRAPH_BATCH_URL, json=batchJSON)
+        if result.status_code in (429, 503) and retries < MAX_RETRIES:  # Whole batch was throttled, wait and send it again
+            retries += 1
+            time.sleep(retryDelay(result.headers.get("Retry-After"), 2 ** retries))
+            pending = batch + pending
+            continue
+        result.raise_for_status()
+
+        retryAfter = 0
+        for response in result.json()["responses"]:
+            index = int(response["id"])
+            response["headers"] = {key.lower(): value for key, value in response.get("headers", {}).items()}
+            if response["status"] in (429, 503) and retries < MAX_RETRIES:  # Only this request was throttled
+                retryAfter = max(retryAfter, retryDelay(response["headers"].get("retry-after"), 2 ** (retries + 1)))
+                pending.append(index)
+            else:
+                responses[index] = response
+        if retryAfter:
+            retries += 1
+            time.sleep(retryAfter)
+
+    return responses
+
+
+
+def resolvePaths(tokenProvider, driveID: str, paths: list) -> list:
+    """
+    Function looks up the item ID for every path (relative to the drive root)
+    in as few batched calls as possible. Paths that don't exist come back as
+    None.
+    """
+    requestList = [{"method": "GET", "url": f"/drives/{driveID}/root:/{urllib.parse.quote(path.strip('/'))}?$select=id,name"}
+                   if path.strip("/") else {"method": "GET", "url": f"/drives/{driveID}/root?$select=id,name"}
+                   for path in paths]
+    return [response["body"]["id"] if response["status"] == 200 else None
+            for response in batchRequests(tokenProvider, requestList)]
+
+
+
+def copyRequest(driveID: str, itemID: str, destDriveID: str, destFolderID: str, newName: str = None) -> dict:
+    """
+    Function builds the batch request that copies an item into a folder on
+    the same or a different drive. Graph answers it with a 202 and a Location
+    header holding the async monitor URL.
+    """
+    body = {"parentReference": {"driveId": destDriveID, "id": destFolderID}}
+    if newName is not None:
+        body["name"] = newName
+    return {"method": "POST", "url": f"/drives/{driveID}/items/{itemID}/copy", "body": body}
+
+
+
+def moveRequest(driveID: str, itemID: str, destFolderID: str, newName: str = None) -> dict:
+    """
+    Function builds the batch request that moves an item into another folder
+    on the same drive by changing its parentReference. Graph can't move items
+    between drives this way, see moveItems() for how that is handled.
+    """
+    body = {"parentReference": {"id": destFolderID}}
+    if newName is not None:
+        body["name"] = newName
+    return {"method": "PATCH", "url": f"/drives/{driveID}/items/{itemID}", "body": body}
+
+
+
+def waitForMonitors(monitorURLs: list, maxDelay: int = 30, timeout: int = MONITOR_TIMEOUT) -> list:
+    """
+    Function polls Graph's async monitor URLs until every copy has finished.
+    The delay between rounds starts at one second and doubles up to maxDelay,
+    so short copies finish quickly while long ones aren't polled constantly.
+    Monitor URLs are pre-authenticated, so no token is needed. A monitor that
+    answers with an error (other than throttling), or that is still running
+    after timeout seconds, is marked as failed so it can't hold up the rest.
+
+    Parameters
+    ----------
+    monitorURLs : list of str
+        The Location headers returned by copy requests.
+    maxDelay : int
+        The longest amount of seconds to wait between polling rounds.
+    timeout : int
+        The longest amount of seconds to wait for every monitor to finish.
+
+    Returns
+    -------
+    statuses : list of dict
+        The final monitor JSON for each URL in the same order, with "status"
+        being either "completed" or "failed".
+    """
+    statuses = [None] * len(monitorURLs)
+    pending = list(range(len(monitorURLs)))
+    delay = 1
+    deadline = time.monotonic() + timeout
+
+    while pending:
+        time.sleep(delay)
+        stillPending = []
+        for index in pending:
+            try:
+                result = requests.get(monitorURLs[index], allow_redirects=False)
+            except requests.RequestException:           # Network hiccup, check this one again next round
+                stillPending.append(index)
+                continue
+            if result.status_code == 303:               # Some monitors redirect to the new item once they are done
+                statuses[index] = {"status": "completed", "resourceLocation": result.headers.get("Location")}
+            elif result.status_code in (429, 503):      # Throttled, check this one again next round
+                stillPending.append(index)
+            elif not 200 <= result.status_code < 300:   # Monitor is gone or broken, it will never finish
+                statuses[index] = {"status": "failed", "error": f"HTTP {result.status_code}: {result.text[:200]}"}
+            else:
+                try:
+                    status = result.json()
+                except ValueError:                      # Empty or non-JSON body
+                    statuses[index] = {"status": "failed", "error": f"Unreadable monitor response: {result.text[:200]}"}
+                    continue
+                if status.get("status") in ("completed", "failed"):
+                    statuses[index] = status
+                else:
+                    stillPending.append(index)
+        pending = stillPending
+        if pending and time.monotonic() >= deadline:    # Giving up on whatever is left so the other results aren't lost
+            for index in pending:
+                statuses[index] = {"status": "failed", "error": f"Still not finished after {timeout} seconds"}
+            break
+        delay = min(delay * 2, maxDelay)
+
+    return statuses
+
+
+
+def copyItems(tokenProvider, operations: list) -> list:
+    """
+    Function copies every item in operations server-side and waits until all
+    of them have finished.
+
+    Parameters
+    ----------
+    tokenProvider : token_generator.TokenProvider
+        The object returned by tokenGen(). Supplies the current (automatically
+        refreshed) token used for authentication with the Microsoft Graph API calls.
+    operations : list of dict
+        Each operation has a "driveID" and "itemID" for the source and a
+        "destDriveID" and "destFolderID" for where the copy goes, plus an
+        optional "newName".
+
+    Returns
+    -------
+    results : list of bool
+        Whether each copy succeeded, in the same order as operations.
+    """
+    responses = batchRequests(tokenProvider, [copyRequest(op["driveID"], op["itemID"], op["destDriveID"], op["destFolderID"], op.get("newName"))
+                                      for op in operations])
+
+    results = [False] * len(operations)
+    started = [index for index, response in enumerate(responses) if response["status"] == 202]
+    statuses = waitForMonitors([responses[index]["headers"]["location"] for index in started])
+    for index, status in zip(started, statuses):
+        results[index] = status["status"] == "completed"
+    return results
+
+
+
+def moveItems(tokenProvider, operations: list) -> list:
+    """
+    Function moves every item in operations. Moves inside the same drive are a
+    single PATCH, while moves between drives are done as a server-side copy
+    followed by deleting the original once the copy has completed.
+
+    Parameters
+    ----------
+    tokenProvider : token_generator.TokenProvider
+        The object returned by tokenGen(). Supplies the current (automatically
+        refreshed) token used for authentication with the Microsoft Graph API calls.
+    operations : list of dict
+        Same format as copyItems().
+
+    Returns
+    -------
+    results : list of bool
+        Whether each move succeeded, in the same order as operations.
+    """
+    results = [False] * len(operations)
+    sameDrive = [index for index, op in enumerate(operations) if op["driveID"] == op["destDriveID"]]
+    crossDrive = [index for index, op in enumerate(operations) if op["driveID"] != op["destDriveID"]]
+
+    responses = batchRequests(tokenProvider, [moveRequest(operations[index]["driveID"], operations[index]["itemID"],
+                                                  operations[index]["destFolderID"], operations[index].get("newName"))
+                                      for index in sameDrive])
+    for index, response in zip(sameDrive, responses):
+        results[index] = response["status"] == 200
+
+    copied = [index for index, ok in zip(crossDrive, copyItems(tokenProvider, [operations[index] for index in crossDrive])) if ok]
+    responses = batchRequests(tokenProvider, [{"method": "DELETE", "url": f"/drives/{operations[index]['driveID']}/items/{operations[index]['itemID']}"}
+                                      for index in copied])
+    for index, response in zip(copied, responses):
+        results[index] = response["status"] == 204
+
+    return results
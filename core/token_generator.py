@@ -1,20 +1,26 @@
 # Script by: DarkSplash
-# Last edited: 2023-01-06
+# Last edited: 2026-10-19
 
 # This is one of the dependency scripts for the downloader/uploader script.
 # This specific script first checks to see if all selenium dependencies are installed,
-# and then later logs into your M365 account to generate the MSAL token.
+# and then later logs into your M365 account to generate the MSAL token. The token
+# is handed out through a TokenProvider, which keeps it refreshed in the background
+# so transfers that run longer than the token's lifetime don't fail halfway.
 
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
 
+import core.totp_helper as totp_helper                  # Script to generate MFA codes that aren't about to expire
+
 import msal
 import os
-import pyotp
+import requests
+import threading
 import time
 
 # Packageless Terminal Colors: https://stackoverflow.com/a/21786287
@@ -22,6 +28,13 @@ RED = "\x1b[1;31;40m"
 GREEN = "\x1b[1;32;40m"
 CLEAR = "\x1b[0m"
 
+REFRESH_MARGIN = 300                                    # How many seconds before the token expires it gets refreshed
+REFRESH_RETRY = 60                                      # How many seconds to wait before trying again if a refresh fails
+
+MFA_BOX_ID = "idTxtBx_SAOTCC_OTC"                       # ID of the MFA code input box
+MFA_ERROR_ID = "idSpan_SAOTCC_Error_OTC"                # ID of the error shown under the MFA code box when a code is rejected
+MFA_ATTEMPTS = 3                                        # How many codes are tried before giving up on the login
+MFA_RESULT_WAIT = 10                                    # How long to wait for the MFA page to accept or reject a code
 
 
 def seleniumChecker():
@@ -61,34 +74,65 @@ def seleniumChecker():
 
 
 
-def getTOTP(mfa_secret: str) -> str:
+def submitMFA(driver, mfaSecret: str, driverWaitDuration: int) -> bool:
     """
-    Function takes an MFA secret and generates you the Time-Based One Time
-    Password (TOTP) using the PyOTP library. Returns a six-digit TOTP code.
+    Function types an MFA code into the MFA page and checks if it was accepted.
+    If Microsoft rejects the code (normally because it expired on the way), a
+    fresh code is submitted right away on the same page, up to MFA_ATTEMPTS
+    times, instead of starting the whole login over again.
 
     Parameters
     ----------
-    mfa_secret : str
-        The secret key that gets generated when setting up MFA. Note that this
-        string is from the general Authenticator App when looking at your M365
-        account security tab, not the Microsoft Authenticator. You can have 
-        both a Microsoft Authenticator and a general Authenticator App setup at
-        the same time.
+    driver : selenium.webdriver.Firefox
+        The browser sitting on the MFA page.
+    mfaSecret : str
+        The MFA_SECRET variable from msal_config.env.
+    driverWaitDuration : int
+        How long the webdriver will look for new elements.
 
     Returns
     -------
-    value : str
-        The six-digit TOTP value that correlates to the current time and the
-        mfa_secret.  Each value is valid for 30 seconds, with values resetting
-        at the start of each minute and halfway through each minute.
+    accepted : bool
+        True if the MFA page was left behind, False if every attempt was rejected.
     """
-    totp = pyotp.TOTP(mfa_secret)
-    value = totp.now()
-    return value
-
-
-
-def loginProcess(authFlow: dict, guiFlag: bool, useMFA: bool) -> str:
+    usedCode = None
+    for attempt in range(MFA_ATTEMPTS):
+        if usedCode is None:
+            mfaCode = totp_helper.getTOTP(mfaSecret)    # Grab TOTP code only after page has loaded due to time sensitive nature of TOTPs
+        else:
+            mfaCode = totp_helper.nextTOTP(mfaSecret, usedCode) # Microsoft won't take the same code twice
+
+        otpBox = WebDriverWait(driver, driverWaitDuration).until(
+            EC.presence_of_element_located((By.ID, MFA_BOX_ID)))
+        otpBox.clear()
+        otpBox.send_keys(mfaCode)
+        otpBox.send_keys(Keys.RETURN)
+        usedCode = mfaCode
+
+        if attempt > 0:                                 # Letting the last attempt's error message clear before checking for a new one
+            try:
+                WebDriverWait(driver, driverWaitDuration).until(EC.invisibility_of_element_located((By.ID, MFA_ERROR_ID)))
+            except TimeoutException:
+                pass
+
+        try:                                            # Either the MFA page goes away or it shows an error under the code box
+            WebDriverWait(driver, MFA_RESULT_WAIT).until(EC.any_of(
+                EC.visibility_of_element_located((By.ID, MFA_ERROR_ID)),
+                EC.invisibility_of_element_located((By.ID, MFA_BOX_ID))))
+        except TimeoutException:
+            return True                                 # No error appeared, carry on and let the later steps decide
+
+        errors = driver.find_elements(By.ID, MFA_ERROR_ID)
+        if not errors or not errors[0].is_displayed():
+            return True
+        retrying = ", retrying with the next code..." if attempt + 1 < MFA_ATTEMPTS else ""
+        print(f"\n{RED}MFA code was rejected ({attempt + 1}/{MFA_ATTEMPTS}){retrying}{CLEAR}")
+
+    return False
+
+
+
+def loginProcess(authFlow: dict, guiFlag: bool, useMFA: bool, config) -> str:
     """
     Function takes an auth flow generated by MSAL's initiate_auth_code_flow()
     function and uses Selenium to login and accept the Azure app permissions.
@@ -110,6 +154,9 @@ def loginProcess(authFlow: dict, guiFlag: bool, useMFA: bool) -> str:
     useMFA : bool
         A boolean variable that is set at script runtime with a flag. Determines
         if MFA script procedures will be ran. By default this is set to True.
+    config : dotenv_checker.M365Config
+        The object returned by dotenvInit(). Supplies the password and MFA
+        secret used to log in.
 
     Returns
     -------
@@ -137,21 +184,24 @@ def loginProcess(authFlow: dict, guiFlag: bool, useMFA: bool) -> str:
     passwordBox = WebDriverWait(driver, driverWaitDuration).until(               
         EC.presence_of_element_located((By.ID, "i0118")))   # Selecting password input box
     
-    passwordBox.send_keys(os.environ.get("M365_PASSWORD"))
+    passwordBox.send_keys(config.password)
     passwordBox.send_keys(Keys.RETURN)
 
     ### MFA CODE FIELD ###
     if useMFA:
         time.sleep(sleepDuration)                       # Waiting for redirect to MFA auth page
         try:                                            # Sometimes MFA doesnt appear even with MFA enabled?
-            otpBox = WebDriverWait(driver, driverWaitDuration).until(
-                EC.presence_of_element_located((By.ID, "idTxtBx_SAOTCC_OTC")))  # Selecting MFA input box
-
-            mfaCode = getTOTP(os.environ.get("MFA_SECRET")) # Grab TOTP code only after page has loaded due to time sensitive nature of TOTPs
-            otpBox.send_keys(mfaCode)
-            otpBox.send_keys(Keys.RETURN)
-        except:                                         # If for whatever reason the MFA login doesn't appear, pass on by
-            pass
+            WebDriverWait(driver, driverWaitDuration).until(
+                EC.presence_of_element_located((By.ID, MFA_BOX_ID)))    # Selecting MFA input box
+            mfaPage = True
+        except TimeoutException:                        # If for whatever reason the MFA login doesn't appear, pass on by
+            mfaPage = False
+
+        if mfaPage and not submitMFA(driver, config.mfaSecret, driverWaitDuration):
+            driver.quit()
+            print(f"\n{RED}Every MFA code was rejected, check the MFA_SECRET variable in msal_config.env{CLEAR}")
+            print("\nExiting script...")
+            raise SystemExit(0)
 
     ### APP PERMISSIONS FIELD ###
     time.sleep(sleepDuration)                           # Accepting Azure App permissions
@@ -163,7 +213,7 @@ def loginProcess(authFlow: dict, guiFlag: bool, useMFA: bool) -> str:
             acceptButton = WebDriverWait(driver, driverWaitDuration).until(
                 EC.presence_of_element_located((By.ID, "idSIButton9")))
             acceptButton.click()
-    except:
+    except TimeoutException:
         pass
 
     ### REMEMBER THIS PC ###
@@ -172,7 +222,7 @@ def loginProcess(authFlow: dict, guiFlag: bool, useMFA: bool) -> str:
         noButton = WebDriverWait(driver, driverWaitDuration).until( # Cannot get this prompt to re-appear no matter what I try
             EC.presence_of_element_located((By.ID, "idBtn_Back")))
         noButton.click()
-    except:                                             # If there is no "Remember this PC" prompt, continue on to the Redirect URI
+    except TimeoutException:                            # If there is no "Remember this PC" prompt, continue on to the Redirect URI
         pass
 
     time.sleep(10)                                      # Waiting for Firefox to fail loading the localhost redirect
@@ -229,18 +279,188 @@ def createAuthResponseDict(url: str) -> dict:
     return authResponse
 
 
-def tokenGen(guiFlag: bool, useMFA: bool):
+class TokenProvider:
+    """
+    Class that holds the MSAL token and keeps it fresh. A background thread
+    uses MSAL's refresh token to get a new access token REFRESH_MARGIN seconds
+    before the current one expires, so every Graph call made through request()
+    (or get(), post(), put(), patch(), and delete()) always uses the current
+    token. If Graph still answers with a 401, the token is refreshed and the
+    call is retried once. Safe to share between threads.
+
+    Parameters
+    ----------
+    pca : msal.PublicClientApplication
+        The application the token was generated with. Its token cache holds
+        the refresh token used to get new access tokens.
+    token : dict
+        A dictionary object created by MSAL's acquire_token_by_auth_code_flow()
+        function.
+    scopes : list of str
+        The scopes the token was generated for.
+    """
+    def __init__(self, pca, token: dict, scopes: list):
+        self.pca = pca
+        self.scopes = scopes
+        self.lock = threading.Lock()                    # Only held while reading or swapping the token, never during network calls
+        self.refreshLock = threading.Lock()             # Keeps more than one refresh from running at the same time
+        self.token = token
+        self.expiresAt = time.time() + int(token.get("expires_in", 3600))
+        self.stopEvent = threading.Event()
+        self.thread = threading.Thread(target=self.refreshLoop, daemon=True)   # Daemon thread so it never keeps the script from exiting
+        self.thread.start()
+
+
+    def accessToken(self) -> str:
+        """
+        Function returns the current access token.
+        """
+        with self.lock:
+            return self.token["access_token"]
+
+
+    def headers(self) -> dict:
+        """
+        Function returns the HTTP header used for authentication with Microsoft
+        Graph, built from the current access token.
+        """
+        return {'Authorization': 'Bearer {}'.format(self.accessToken())}
+
+
+    def refresh(self, staleToken: str = None) -> bool:
+        """
+        Function gets a new access token with MSAL's acquire_token_silent(). If
+        staleToken is given and another thread has already replaced it, nothing
+        is done so a burst of 401s only causes one refresh. MSAL is called
+        without holding the token lock, so other threads keep using the current
+        token while the refresh is in flight.
+
+        Returns
+        -------
+        refreshed : bool
+            True if the provider now has a different token than staleToken.
+        """
+        with self.refreshLock:
+            if staleToken is not None and staleToken != self.accessToken():
+                return True
+
+            accounts = self.pca.get_accounts()
+            result = None
+            if accounts:
+                result = self.pca.acquire_token_silent(self.scopes, account=accounts[0], force_refresh=True)
+            if not result or "access_token" not in result:
+                print(f"\n{RED}Unable to refresh the M365 token:{CLEAR} {(result or {}).get('error_description', 'no account in token cache')}")
+                return False
+
+            with self.lock:                             # Swapping in the new token is the only part other threads wait on
+                self.token = result
+                self.expiresAt = time.time() + int(result.get("expires_in", 3600))
+            return True
+
+
+    def refreshLoop(self):
+        """
+        Function ran by the background thread. Sleeps until REFRESH_MARGIN
+        seconds before the token expires and then refreshes it, trying again
+        every REFRESH_RETRY seconds if the refresh fails.
+        """
+        delay = max(self.expiresAt - REFRESH_MARGIN - time.time(), 0)
+        while not self.stopEvent.wait(delay):           # Returns True (ending the loop) once stop() is called
+            if self.refresh():
+                delay = max(self.expiresAt - REFRESH_MARGIN - time.time(), REFRESH_RETRY)
+            else:
+                delay = REFRESH_RETRY
+
+
+    def stop(self):
+        """
+        Function stops the background refresh thread.
+        """
+        self.stopEvent.set()
+
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Function makes an HTTP request to Microsoft Graph with the current token
+        added to its headers. Takes the same arguments as requests.request().
+        If the token was rejected with a 401, it is refreshed and the request is
+        sent one more time.
+        """
+        extraHeaders = kwargs.pop("headers", {})
+        token = self.accessToken()
+        result = requests.request(method, url, headers={**extraHeaders, 'Authorization': 'Bearer {}'.format(token)}, **kwargs)
+        if result.status_code == 401 and self.refresh(token):
+            if hasattr(kwargs.get("data"), "seek"):     # Rewinding file-like bodies so they are sent again in full
+                kwargs["data"].seek(0)
+            result = requests.request(method, url, headers={**extraHeaders, **self.headers()}, **kwargs)
+        return result
+
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+
+    def patch(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PATCH", url, **kwargs)
+
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+
+
+def tokenGen(guiFlag: bool, useMFA: bool, config) -> TokenProvider:
+    """
+    Function creates the MSAL Public Client Application, logs into M365 with
+    loginProcess(), and generates a token from the login's auth response. The
+    token is wrapped in a TokenProvider so it keeps itself refreshed.
+
+    Parameters
+    ----------
+    guiFlag : bool
+        A boolean variable that is set at script runtime with a flag. Determines
+        if Firefox will open with a GUI or not. By default this is set to False.
+    useMFA : bool
+        A boolean variable that is set at script runtime with a flag. Determines
+        if MFA script procedures will be ran. By default this is set to True.
+    config : dotenv_checker.M365Config
+        The object returned by dotenvInit(). Supplies the Azure app and the
+        account to log in with.
+
+    Returns
+    -------
+    tokenProvider : TokenProvider
+        Supplies the current access token to every Microsoft Graph API call.
+
+    Raises
+    ------
+    SystemExit
+        Exits the script if MSAL was unable to generate a token.
+    """
     appScopes = ["Files.ReadWrite.All","Sites.Read.All"]        # Scopes defined in Azure App Registration
     seleniumChecker()                                           # Making sure Selenium & Firefox/geckodriver work
     
-    pca = msal.PublicClientApplication(os.environ.get("CLIENT_ID"), authority=os.environ.get("AUTHORITY_URL"))  # Create a Public Application
-    authFlow = pca.initiate_auth_code_flow(appScopes, login_hint=os.environ.get("M365_USERNAME"))               # Generate the auth flow
+    pca = msal.PublicClientApplication(config.clientID, authority=config.authorityURL)  # Create a Public Application
+    authFlow = pca.initiate_auth_code_flow(appScopes, login_hint=config.username)       # Generate the auth flow
 
     print("\nLogging into M365 and accepting app permissions (can take up to a minute)...")
-    authResponseUrl = loginProcess(authFlow, guiFlag, useMFA)   # Get the auth response in string format
-    authResponse = createAuthResponseDict(authResponseUrl)      # Convert the auth response string into a dict
+    authResponseUrl = loginProcess(authFlow, guiFlag, useMFA, config)   # Get the auth response in string format
+    authResponse = createAuthResponseDict(authResponseUrl)              # Convert the auth response string into a dict
 
     print("\nGenerating token..")
     token = pca.acquire_token_by_auth_code_flow(auth_code_flow=authFlow, auth_response=authResponse)    # Generate a token with the authFlow and authResponse dictionaries
 
-    return token
\ No newline at end of file
+    if "access_token" not in token:
+        print(f"\n{RED}Unable to generate a token:{CLEAR} {token.get('error_description', token)}")
+        print("\nExiting script...")
+        raise SystemExit(0)
+
+    return TokenProvider(pca, token, appScopes)                 # Keeps the token refreshed in the background
@@ -0,0 +1,68 @@
+# Script by: DarkSplash
+# Last edited: 2026-10-19
+
+# This is one of the dependency scripts for the downloader/uploader script and the
+# MFA code generator. This specific script generates the six-digit MFA codes. Since
+# each code is only valid for the rest of its 30 second window, a code that is about
+# to expire is never handed out, the next window's code is waited for instead.
+
+import pyotp
+import time
+
+TOTP_INTERVAL = 30                                      # How many seconds each code is valid for
+MIN_REMAINING = 5                                       # Fewest seconds a code must have left before it is used
+
+
+
+def secondsRemaining(now: float = None) -> int:
+    """
+    Function returns how many seconds are left in the current code's window.
+    Windows reset at the start of each minute and halfway through each minute.
+    """
+    now = time.time() if now is None else now
+    return TOTP_INTERVAL - int(now) % TOTP_INTERVAL
+
+
+
+def getTOTP(mfaSecret: str, minRemaining: int = MIN_REMAINING) -> str:
+    """
+    Function takes an MFA secret and generates you the Time-Based One Time
+    Password (TOTP) using the PyOTP library. If the current code has fewer
+    than minRemaining seconds left, it waits for the next window so the code
+    doesn't expire before it is submitted.
+
+    Parameters
+    ----------
+    mfaSecret : str
+        The secret key that gets generated when setting up MFA. Note that this
+        string is from the general Authenticator App when looking at your M365
+        account security tab, not the Microsoft Authenticator. You can have
+        both a Microsoft Authenticator and a general Authenticator App setup at
+        the same time.
+    minRemaining : int, optional
+        Fewest seconds the returned code must still be valid for.
+
+    Returns
+    -------
+    value : str
+        The six-digit TOTP value that correlates to the current time and the
+        mfaSecret.
+    """
+    remaining = secondsRemaining()
+    if remaining < minRemaining:
+        time.sleep(remaining)                           # Sleeping into the start of the next window
+    return pyotp.TOTP(mfaSecret, interval=TOTP_INTERVAL).at(time.time())
+
+
+
+def nextTOTP(mfaSecret: str, usedCode: str, minRemaining: int = MIN_REMAINING) -> str:
+    """
+    Function returns a code that is different from usedCode, waiting for the
+    next window if needed. Microsoft won't accept the same code twice, so this
+    is used when resubmitting after a rejected code.
+    """
+    value = getTOTP(mfaSecret, minRemaining)
+    while value == usedCode:
+        time.sleep(secondsRemaining())
+        value = getTOTP(mfaSecret, minRemaining)
+    return value
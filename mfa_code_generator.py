@@ -1,61 +1,55 @@
 # Script by: DarkSplash
-# Last edited: 2023-01-12
+# Last edited: 2026-10-19
 
 # Small script to print out your six-digit MFA code to console so you don't have
 # to setup MFA on your application of choice.  Only requires the "MFA_SECRET"
-# variable to be filled out in msal_config.env.
+# variable to be filled out in msal_config.env. If the current code has less than
+# MIN_TYPING_TIME seconds left, the next code is waited for and printed instead.
+
+import core.dotenv_checker as dotenv_checker            # Script to check msal_config.env variables
+import core.totp_helper as totp_helper                  # Script to generate MFA codes that aren't about to expire
 
-from datetime import datetime
-from dotenv import load_dotenv
 from pathlib import Path
 
+import argparse
 import os
-import pyotp
+
+MIN_TYPING_TIME = 10                                    # Fewest seconds a printed code has left, giving time to type it in
 
 
-def getTOTP(mfa_secret: str) -> str:
+def argparseInit():
     """
-    Function takes a MFA secret and generates you the Time-Based One Time 
-    Password (TOTP) using the PyOTP library. Returns a six-digit TOTP code.
-
-    Parameters
-    ----------
-    mfa_secret : str
-        The secret key that gets generated when setting up MFA. Note that this
-        string is from the general Authenticator App when looking at your O365
-        account security tab, not the Microsoft Authenticator. You can have 
-        both a Microsoft Authenticator and a general Authenticator App setup at
-        the same time.
+    Function for command line flags that can be added while running the script.
+    The only flag is -P or --profile, which picks the profile whose MFA_SECRET
+    is used.
 
     Returns
     -------
-    value : str
-        The six-digit TOTP value that correlates to the current time and the
-        mfa_secret.  Each value is valid for 30 seconds, with values resetting
-        at the start of each minute and halfway through each minute.
+    args : argparse.Namespace
+        Every flag the script was ran with.
     """
-    totp = pyotp.TOTP(mfa_secret)
-    value = totp.now()
-    return value
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-P","--profile", help="Uses the msal_config.env variables prefixed with \"PROFILE__\" instead of the unprefixed ones")
+    return parser.parse_args()
 
 
 
-def dotenvInit():
+def dotenvInit(profile: str = None):
     """
     Function loads the msal_config.env file that should created during the
     setup process. If it does not exist, it directs the user to the
     sharepoint_downloader_msal.py file. If it does exist, it only checks
     for the MFA_SECRET variable as that is the only thing needed to
-    generate a TOTP code.
+    generate a TOTP code. Returns the M365Config of the chosen profile.
     """
     stringPath = f"{os.getcwd()}/msal_config.env"
     if Path(stringPath).exists():                       # If the file exists
-        dotenvPath = Path(stringPath)                   # Converting into proper path for whatever OS the script is on
-        load_dotenv(dotenvPath)                         # Loading the environment variables
+        config = dotenv_checker.loadConfig(True, (), profile)   # Loading the variables without checking any of them
 
-        if len(os.environ.get("MFA_SECRET")) == 0:      # If the secret variable is empty exit the script
+        if len(config.mfaSecret) == 0:                  # If the secret variable is empty exit the script
             print("MFA Secret variable is empty.  Please enter your MFA secret in msal_config.env and try again.")
             raise SystemExit(0)
+        return config
     else:
         print("You do not have msal_config.env in the same directory as your script.")
         print("Please either create it following the steps in the README or run")
@@ -65,11 +59,11 @@ def dotenvInit():
 
 
 def main():
-    dotenvInit()
-    now = datetime.now()
-    
-    print(f"{getTOTP(os.environ.get('MFA_SECRET'))}")
-    print(f"Code valid for {30 - now.second%30} more seconds")  # Timer on TOTP is 30 seconds long, resetting at 30 sec and next minute
+    args = argparseInit()
+    config = dotenvInit(args.profile)
+
+    print(f"{totp_helper.getTOTP(config.mfaSecret, MIN_TYPING_TIME)}")
+    print(f"Code valid for {totp_helper.secondsRemaining()} more seconds")  # Timer on TOTP is 30 seconds long, resetting at 30 sec and next minute
 
 
 
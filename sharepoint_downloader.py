@@ -1,5 +1,5 @@
 # Script by: DarkSplash
-# Last edited: 2023-01-12
+# Last edited: 2026-10-19
 
 # This is a 100% working Python script that will download a file from a 
 # SharePoint/OneDrive/Teams location. This script supports MFA & non-MFA logins,
@@ -10,10 +10,13 @@
 import core.dotenv_checker as dotenv_checker            # Script to check msal_config.env variables
 import core.token_generator as token_generator          # Script to generate a MSAL token
 import core.driveid_finder as driveid_finder            # Script to attempt to find a SharePoint/OneDrive/Teams drive_id
+import core.content_cache as content_cache              # Script for the shared local cache of downloaded files
+import core.bandwidth_limiter as bandwidth_limiter      # Script to share a bandwidth limit between transfers
 
 import argparse
 import os
 import requests
+import sys
 import urllib
 
 from pathlib import Path
@@ -24,6 +27,8 @@ GREEN = "\x1b[1;32;40m"
 BLUE = "\x1b[1;34;40m"
 CLEAR = "\x1b[0m"
 
+DOWNLOAD_CHUNK_SIZE = 1048576                           # 1 MiB, the most of the file body held in memory at once while streaming
+DEFAULT_CACHE_SIZE = 10240                              # MiB, default size limit of the shared cache when --cache is used
 
 
 def argparseInit():
@@ -46,17 +51,46 @@ def argparseInit():
         A flag that will be set to True if the user wishes to attempt to find
         their drive id through the script. By default set to False, and can be
         set to True with the -D or --driveid args.
+    toStdout : bool
+        A flag that will be set to True if the user wishes to stream the
+        downloaded file to stdout instead of writing it to disk. By default set
+        to False, and can be set to True with the -O or --stdout args. When set,
+        every status message is printed to stderr instead so the only thing in
+        stdout is the file itself.
+    cacheDir : str or None
+        The directory of the shared content cache set with the -C or --cache
+        args. By default set to None, meaning no cache is used.
+    cacheSize : int
+        The cache's size limit in MiB, set with the --cache-size arg. By
+        default set to DEFAULT_CACHE_SIZE.
+    limiter : bandwidth_limiter.BandwidthLimiter or None
+        The bandwidth limit for the download, created from the -L or --limit
+        and --limit-file args. By default set to None (unlimited).
+    profile : str or None
+        The msal_config.env profile to use, set with the -P or --profile args.
+        By default set to None, meaning the variables without a prefix are used.
     """
     guiFlag = False
     useMFA = True
     runDriveID = False
+    toStdout = False
 
     parser = argparse.ArgumentParser()
     parser.add_argument("-G","--gui", help="Runs the Selenium/Firefox portion of this script with a GUI instead of headlessly", action="store_true")
     parser.add_argument("-N","--nomfa", help="Allows you to run the script without filling in the MFA_SECRET variable", action="store_true")
     parser.add_argument("-D","--driveid", help="Runs two different methods to attempt to find your M365_DRIVE_ID variable", action="store_true")
+    parser.add_argument("-O","--stdout", help="Streams the downloaded file to stdout instead of saving it, so it can be piped into another program", action="store_true")
+    parser.add_argument("-C","--cache", metavar="DIR", help="Uses (and creates if needed) a local cache of downloaded files in DIR that can be shared with other jobs")
+    parser.add_argument("--cache-size", type=int, metavar="MIB", default=DEFAULT_CACHE_SIZE, help=f"Most disk space the cache may use in MiB before old files are evicted (default: {DEFAULT_CACHE_SIZE})")
+    parser.add_argument("-L","--limit", type=int, metavar="KIB", help="Limits the download to this many KiB per second")
+    parser.add_argument("--limit-file", metavar="FILE", help="Re-reads the KiB per second limit from FILE every 5 seconds so it can be changed while downloading (0 is unlimited)")
+    parser.add_argument("-P","--profile", help="Uses the msal_config.env variables prefixed with \"PROFILE__\" instead of the unprefixed ones")
     args = parser.parse_args()
 
+    if args.stdout:                                     # Done first so none of the prints below end up in the piped file
+        sys.stdout = sys.stderr                         # Every status print now goes to stderr, the file bytes go to sys.__stdout__
+        print("\nFile will be streamed to stdout instead of being saved...")
+        toStdout = True
     if args.gui:
         print("\nFirefox will launch with a GUI instead of headlessly...")
         guiFlag = True
@@ -66,63 +100,191 @@ def argparseInit():
     if args.driveid:
         print("\nScript will only attempt to generate drive_id's...")
         runDriveID = True
-    if guiFlag == False and useMFA == True and runDriveID == False:
+    if args.cache:
+        print(f"\nFiles will be cached in \"{args.cache}\"...")
+    if args.limit or args.limit_file:
+        print(f"\nDownload will be limited to {args.limit or 'the number in ' + args.limit_file} KiB per second...")
+    if args.profile:
+        print(f"\nUsing the \"{args.profile}\" profile from msal_config.env...")
+    limiter = bandwidth_limiter.createLimiter(args.limit, args.limit_file)
+    if guiFlag == False and useMFA == True and runDriveID == False and toStdout == False and args.cache is None and args.profile is None:
         print(f"\n{BLUE}Optional runtime argument can be displayed by adding the \'-h\' flag to the end of your python command above.{CLEAR}")
     
-    return guiFlag, useMFA, runDriveID
+    return guiFlag, useMFA, runDriveID, toStdout, args.cache, args.cache_size, limiter, args.profile
 
 
 
-def downloadFile(token: dict):
+def getItem(tokenProvider, config) -> dict:
     """
-    Function takes a token created by MSAL's acquire_token_by_auth_code_flow()
-    function and uses a value within the token to create an HTTP header. The 
-    Python Requests library is then used to make API calls to Microsoft Graph,
+    Function looks up M365_FILENAME inside M365_FOLDER_PATH with the "drives"
+    API and returns the item's JSON, which has the "@microsoft.graph.downloadUrl"
+    along with the file's eTag and content hashes.
+
+    Parameters
+    ----------
+    tokenProvider : token_generator.TokenProvider
+        The object returned by tokenGen(). Supplies the current (automatically
+        refreshed) token used for authentication with the Microsoft Graph API calls.
+    config : dotenv_checker.M365Config
+        The object returned by dotenvInit(). Supplies the drive, folder, and
+        filename of the file.
+    """
+    itemURL = urllib.parse.quote(f'{config.folderPath}/{config.filename}')  # Converting item path to URL friendly string
+
+    result = tokenProvider.get(f'https://graph.microsoft.com/v1.0/drives/{config.driveID}/root:/{itemURL}')    # Graph API call to file itself
+    return result.json()                                            # Opening up the JSON response Graph gives you
+
+
+
+def streamItem(item: dict, chunkSize: int = DOWNLOAD_CHUNK_SIZE, limiter=None, priority: int = bandwidth_limiter.PRIORITY_NORMAL):
+    """
+    Generator function that downloads an item returned by getItem(). Instead
+    of loading the whole file into memory, the "@microsoft.graph.downloadUrl"
+    is requested as a stream and the file body is yielded piece by piece as it
+    arrives, so a consumer can start working on the first bytes before the
+    download is done.
+
+    Parameters
+    ----------
+    item : dict
+        The item's JSON returned by getItem().
+    chunkSize : int
+        The largest amount of bytes that will be yielded (and held in memory)
+        at one time. By default this is DOWNLOAD_CHUNK_SIZE (1 MiB).
+    limiter : bandwidth_limiter.BandwidthLimiter, optional
+        Shared bandwidth limit the download is read through. When given, the
+        body is read THROTTLE_SLICE bytes at a time instead of chunkSize.
+    priority : int, optional
+        The download's priority when sharing the limiter.
+
+    Yields
+    ------
+    chunk : bytes
+        The next piece of the file's body, at most chunkSize bytes long.
+    """
+    fileDownloadURL = item["@microsoft.graph.downloadUrl"]          # Selecting the value from the "@microsoft.graph.downloadUrl" key
+    with requests.get(fileDownloadURL, stream=True) as download:    # Only the response headers are read here, the body is read below
+        download.raise_for_status()
+        if limiter is not None:                                     # Smaller reads so the limiter can pace the connection
+            chunkSize = bandwidth_limiter.THROTTLE_SLICE
+        yield from bandwidth_limiter.throttleChunks(limiter, download.iter_content(chunk_size=chunkSize), priority)
+
+
+
+def readFile(path: str, chunkSize: int = DOWNLOAD_CHUNK_SIZE):
+    """
+    Generator function that yields a local file chunkSize bytes at a time.
+    """
+    with open(path, "rb") as file:
+        yield from iter(lambda: file.read(chunkSize), b"")
+
+
+
+def writeChunks(chunks, output):
+    """
+    Generator function that writes every chunk into output as it passes
+    through, used to stream a download to stdout while it is being cached.
+    """
+    for chunk in chunks:
+        output.write(chunk)
+        yield chunk
+
+
+
+def downloadFile(tokenProvider, config, output=None, cache=None, limiter=None, priority: int = bandwidth_limiter.PRIORITY_NORMAL):
+    """
+    Function takes the TokenProvider created by tokenGen(), which adds the
+    current token as an HTTP header to every API call made to Microsoft Graph,
     specifically to the "drives" API with the header being used for
     authentication. Finally, inside the "drives" API JSON response, there is a
     value "@microsoft.graph.downloadUrl" which is passed to the
-    Requests library once more to download the file. The file is then written
-    to the same directory as the script. 
+    Requests library once more to download the file. The file is streamed
+    through streamItem() and written either to the same directory as the
+    script or to the file-like object passed in as output. If a cache is
+    given and already has the file, nothing is downloaded at all.
 
     Parameters
     ----------
-    token : dict
-        A dictionary object created by MSAL's acquire_token_by_auth_code_flow()
-        function. Contains information needed to create the HTTP header that is
-        used for authentication with the Microsoft Graph API calls.
+    tokenProvider : token_generator.TokenProvider
+        The object returned by tokenGen(). Supplies the current (automatically
+        refreshed) token used for authentication with the Microsoft Graph API calls.
+    config : dotenv_checker.M365Config
+        The object returned by dotenvInit(). Supplies the file to download and
+        the name it is saved as.
+    output : file-like object, optional
+        Any object with a binary write() method (such as sys.stdout.buffer or
+        an open pipe/socket). If given, the file is streamed into it instead of
+        being saved to disk. By default this is None.
+    cache : content_cache.ContentCache, optional
+        A shared content cache. Cached files are linked into place (or read
+        from the cache when streaming) instead of being downloaded, and
+        downloaded files are added to it. By default this is None.
+    limiter : bandwidth_limiter.BandwidthLimiter, optional
+        Shared bandwidth limit the download is read through. By default this
+        is None (unlimited).
+    priority : int, optional
+        The download's priority when sharing the limiter.
     """
-    headers = {'Authorization': 'Bearer {}'.format(token['access_token'])}  # Header will be used for authentication with Microsoft Graph
-
-    itemURL = urllib.parse.quote(f'{os.environ.get("M365_FOLDER_PATH")}/{os.environ.get("M365_FILENAME")}') # Converting item path to URL friendly string
+    item = getItem(tokenProvider, config)
+    fileName = config.filename
 
-    result = requests.get(f'https://graph.microsoft.com/v1.0/drives/{os.environ.get("M365_DRIVE_ID")}/root:/{itemURL}', headers=headers)    # Graph API call to file itself
-    resultJSON = result.json()                                      # Opening up the JSON response Graph gives you
+    if output is not None:                                          # Streaming the file to the caller instead of to disk
+        if cache is None:
+            chunks = streamItem(item, limiter=limiter, priority=priority)
+        else:
+            key = content_cache.cacheKey(item)
+            cachedPath = cache.get(key)
+            if cachedPath is not None:
+                chunks = readFile(cachedPath)
+            else:                                                   # Writing to output while the download goes into the cache
+                cache.put(key, writeChunks(streamItem(item, limiter=limiter, priority=priority), output))
+                chunks = []                                         # Nothing left to write afterwards
+        for chunk in chunks:
+            output.write(chunk)
+        output.flush()
+        print(f"\n{GREEN}File \"{fileName}\" has been sucessfully streamed!{CLEAR}")
+        return
 
-    fileDownloadURL = resultJSON["@microsoft.graph.downloadUrl"]    # Selecting the value from the "@microsoft.graph.downloadUrl" key
-    download = requests.get(fileDownloadURL)                        # Downloading the file
-    
-    open(os.environ.get("M365_FILENAME"), "wb").write(download.content)   # Writing the file to the directory the script is in
+    if cache is None:
+        content_cache.removeTarget(fileName)                        # In case an older cached download left a read-only hardlink here
+        with open(fileName, "wb") as file:                          # Writing the file to the directory the script is in
+            for chunk in streamItem(item, limiter=limiter, priority=priority):
+                file.write(chunk)
+    else:
+        key = content_cache.cacheKey(item)
+        if cache.materialize(key, fileName):
+            print(f"\nFile \"{fileName}\" was already cached, skipping the download...")
+        else:
+            cache.put(key, streamItem(item, limiter=limiter, priority=priority), fileName)
 
-    stringPath = f'{os.getcwd()}/{os.environ.get("M365_FILENAME")}'
+    stringPath = f'{os.getcwd()}/{fileName}'
     if Path(stringPath).exists():
-        print(f"\n{GREEN}File \"{os.environ.get('M365_FILENAME')}\" has been sucessfully downloaded!{CLEAR}")
+        print(f"\n{GREEN}File \"{fileName}\" has been sucessfully downloaded!{CLEAR}")
     else:
-        print(f"\n{RED}File \"{os.environ.get('M365_FILENAME')}\" has not been sucessfully downloaded!{CLEAR}")
+        print(f"\n{RED}File \"{fileName}\" has not been sucessfully downloaded!{CLEAR}")
 
 
 
 def main():
-    guiFlag, useMFA, runDriveID = argparseInit()        # Checking for command flags
-    dotenv_checker.dotenvInit(useMFA, runDriveID)
+    guiFlag, useMFA, runDriveID, toStdout, cacheDir, cacheSize, limiter, profile = argparseInit()  # Checking for command flags
+    config = dotenv_checker.dotenvInit(useMFA, dotenv_checker.TOKEN_KEYS if runDriveID else dotenv_checker.FILE_KEYS, profile)
+    cache = content_cache.ContentCache(cacheDir, cacheSize * 1048576) if cacheDir else None
 
-    token = token_generator.tokenGen(guiFlag, useMFA)
+    tokenProvider = token_generator.tokenGen(guiFlag, useMFA, config)
 
     if runDriveID:                                      # If the flag has been set to programatically check for drive_id's
-        driveid_finder.findDriveID(token)
+        driveid_finder.findDriveID(tokenProvider)
         raise SystemExit(0)                             # Exiting the script as none of the variables needed to download the file were checked
 
     print("\nDownloading file...")
-    downloadFile(token)                                 # Download the file using the token for authentication
+    if toStdout:
+        downloadFile(tokenProvider, config, sys.__stdout__.buffer, cache, limiter)   # Stream the file into the original stdout so it can be piped
+    else:
+        downloadFile(tokenProvider, config, None, cache, limiter)  # Download the file using the token for authentication
+
+    if cache is not None:
+        stats = cache.stats()
+        print(f"\nCache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} files using {stats['bytes'] / 1048576:.1f} of {cacheSize} MiB")
 
 
 
@@ -0,0 +1,98 @@
+# Script by: DarkSplash
+# Last edited: 2026-10-19
+
+# Script to build and search a local index of a SharePoint/OneDrive/Teams drive.
+# Running it with --sync logs in like the downloader/uploader scripts and pulls
+# down every change to the drive since the last sync. Every other flag only
+# reads the local index file, so lookups and searches never touch the network.
+
+import core.dotenv_checker as dotenv_checker            # Script to check msal_config.env variables
+import core.token_generator as token_generator          # Script to generate a MSAL token
+import core.drive_index as drive_index                  # Script that keeps the local SQLite index of the drive
+
+import argparse
+
+# Packageless Terminal Colors: https://stackoverflow.com/a/21786287
+RED = "\x1b[1;31;40m"
+GREEN = "\x1b[1;32;40m"
+CLEAR = "\x1b[0m"
+
+
+
+def argparseInit():
+    """
+    Function for command line flags that can be added while running the script.
+
+    Returns
+    -------
+    args : argparse.Namespace
+        Every flag the script was ran with. Only --sync logs into M365, the
+        rest of the flags are answered from the local index file.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-G","--gui", help="Runs the Selenium/Firefox portion of this script with a GUI instead of headlessly", action="store_true")
+    parser.add_argument("-N","--nomfa", help="Allows you to run the script without filling in the MFA_SECRET variable", action="store_true")
+    parser.add_argument("-P","--profile", help="Uses the msal_config.env variables prefixed with \"PROFILE__\" instead of the unprefixed ones")
+    parser.add_argument("-I","--index", help="Path to the index file (default: drive_index.db)", default="drive_index.db")
+    parser.add_argument("--sync", help="Logs in and updates the index with every change made to the drive since the last sync", action="store_true")
+    parser.add_argument("--lookup", metavar="PATH", help="Prints the item ID for a path such as \"Folder/File.xlsx\"")
+    parser.add_argument("--list", metavar="FOLDER", help="Lists the items inside a folder (use \"\" for the drive root)")
+    parser.add_argument("-r","--recursive", help="Makes --list include everything under the folder instead of just its direct children", action="store_true")
+    parser.add_argument("--glob", metavar="PATTERN", help="Finds every file whose path matches a case sensitive glob such as \"Reports/*.xlsx\"")
+    parser.add_argument("--min-size", type=int, metavar="BYTES", help="Only finds files at least this many bytes big")
+    parser.add_argument("--max-size", type=int, metavar="BYTES", help="Only finds files at most this many bytes big")
+    return parser.parse_args()
+
+
+
+def printItems(items: list):
+    """
+    Function prints one item per line as its ID, size, and path. Folders get a
+    trailing forward slash.
+    """
+    for item in items:
+        size = "" if item["is_folder"] else (item["size"] or 0)
+        suffix = "/" if item["is_folder"] else ""
+        print(f"{item['id']}\t{size:>12}\t{item['path']}{suffix}")
+
+
+
+def main():
+    args = argparseInit()                               # Checking for command flags
+
+    if args.sync:
+        config = dotenv_checker.dotenvInit(not args.nomfa, dotenv_checker.DRIVE_KEYS, args.profile)
+        tokenProvider = token_generator.tokenGen(args.gui, not args.nomfa, config)
+    else:                                               # Queries only need the drive ID, no login
+        config = dotenv_checker.dotenvInit(False, ("M365_DRIVE_ID",), args.profile)
+    driveID = config.driveID
+
+    connection = drive_index.openIndex(args.index)
+
+    if args.sync:
+        print("\nSyncing drive index...")
+        try:
+            changes = drive_index.syncIndex(tokenProvider, connection, driveID)
+        except RuntimeError as e:
+            print(f"\n{RED}{e}{CLEAR}")
+            print("\nExiting script...")
+            raise SystemExit(1)
+        print(f"\n{GREEN}Index \"{args.index}\" is up to date ({changes} changes synced)!{CLEAR}")
+
+    if args.lookup is not None:
+        item = drive_index.lookupPath(connection, driveID, args.lookup)
+        if item is None:
+            print(f"{RED}Nothing found at \"{args.lookup}\"{CLEAR}")
+            raise SystemExit(1)
+        print(item["id"])
+
+    if args.list is not None:
+        printItems(drive_index.listPrefix(connection, driveID, args.list, args.recursive))
+
+    if args.glob is not None or args.min_size is not None or args.max_size is not None:
+        printItems(drive_index.findItems(connection, driveID, args.glob, args.min_size, args.max_size))
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# Script by: DarkSplash
+# Last edited: 2026-10-19
+
+# Script to mirror a whole SharePoint/OneDrive/Teams folder to a local directory.
+# Huge libraries can be split across several PCs by giving each one the same
+# --shard-count and a different --shard-index. Every PC works out on its own which
+# files are its share, and saves its progress to a checkpoint file so a shard that
+# failed part way through can be resumed, even from a different PC.
+# Uses the same msal_config.env file and login process as the other scripts.
+
+import core.dotenv_checker as dotenv_checker            # Script to check msal_config.env variables
+import core.token_generator as token_generator          # Script to generate a MSAL token
+import core.drive_mirror as drive_mirror                # Script that splits the mirror into shards and downloads them
+import core.drive_index as drive_index                  # Script that keeps the local SQLite index of the drive
+import core.content_cache as content_cache              # Script for the shared local cache of downloaded files
+import core.bandwidth_limiter as bandwidth_limiter      # Script to share a bandwidth limit between transfers
+
+import argparse
+
+# Packageless Terminal Colors: https://stackoverflow.com/a/21786287
+RED = "\x1b[1;31;40m"
+GREEN = "\x1b[1;32;40m"
+CLEAR = "\x1b[0m"
+
+DEFAULT_WORKERS = 8                                     # How many files are downloaded at the same time by default
+DEFAULT_CACHE_SIZE = 10240                              # MiB, default size limit of the shared cache when --cache is used
+
+
+
+def argparseInit():
+    """
+    Function for command line flags that can be added while running the script.
+
+    Returns
+    -------
+    args : argparse.Namespace
+        Every flag the script was ran with.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-G","--gui", help="Runs the Selenium/Firefox portion of this script with a GUI instead of headlessly", action="store_true")
+    parser.add_argument("-N","--nomfa", help="Allows you to run the script without filling in the MFA_SECRET variable", action="store_true")
+    parser.add_argument("-P","--profile", help="Uses the msal_config.env variables prefixed with \"PROFILE__\" instead of the unprefixed ones")
+    parser.add_argument("--dest", metavar="DIR", required=True, help="Local directory M365_FOLDER_PATH is mirrored into")
+    parser.add_argument("--shard-index", type=int, default=0, metavar="INDEX", help="Which shard this PC mirrors, from 0 to --shard-count minus 1 (default: 0)")
+    parser.add_argument("--shard-count", type=int, default=1, metavar="COUNT", help="How many PCs the mirror is split between (default: 1)")
+    parser.add_argument("--checkpoint-dir", metavar="DIR", default="mirror_checkpoints", help="Directory the shard checkpoints are saved in, use a shared folder to resume shards on other PCs (default: mirror_checkpoints)")
+    parser.add_argument("--takeover", help="Runs the shard even if it is locked, such as when the PC that was running it crashed", action="store_true")
+    parser.add_argument("-I","--index", metavar="FILE", help="Lists the files from a drive index made by sharepoint_index.py instead of from SharePoint")
+    parser.add_argument("-W","--workers", type=int, default=DEFAULT_WORKERS, help=f"How many files are downloaded at the same time (default: {DEFAULT_WORKERS})")
+    parser.add_argument("-C","--cache", metavar="DIR", help="Shares a local cache of downloaded files in DIR with other jobs on this PC")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE, metavar="MIB", help=f"Size limit of the cache in MiB (default: {DEFAULT_CACHE_SIZE})")
+    parser.add_argument("-L","--limit", type=int, metavar="KIB", help="Limits the total download speed to this many KiB per second")
+    parser.add_argument("--limit-file", metavar="FILE", help="File holding a limit in KiB per second that is re-read while downloading")
+    args = parser.parse_args()
+
+    if args.shard_count < 1 or not 0 <= args.shard_index < args.shard_count:
+        parser.error("--shard-index must be between 0 and --shard-count minus 1")
+    return args
+
+
+
+def main():
+    args = argparseInit()                               # Checking for command flags
+    useMFA = not args.nomfa
+    config = dotenv_checker.dotenvInit(useMFA, dotenv_checker.FOLDER_KEYS, args.profile)
+
+    tokenProvider = token_generator.tokenGen(args.gui, useMFA, config)
+
+    driveID = config.driveID
+    folderPath = config.folderPath.strip("/")
+
+    try:
+        checkpoint = drive_mirror.ShardCheckpoint(args.checkpoint_dir, driveID, folderPath, args.shard_index, args.shard_count)
+    except ValueError as e:                             # Checkpoint was made for a different drive, folder, or --shard-count
+        print(f"\n{RED}{e}{CLEAR}")
+        print("\nExiting script...")
+        raise SystemExit(1)
+    try:
+        checkpoint.claim(args.takeover)
+    except FileExistsError:
+        print(f"\n{RED}Shard {args.shard_index} of {args.shard_count} is locked by \"{checkpoint.lockPath}\", "
+              f"run with --takeover if the PC running it has stopped{CLEAR}")
+        raise SystemExit(1)
+
+    try:
+        print("\nListing files...")
+        if args.index:
+            items = drive_mirror.listIndexedTree(drive_index.openIndex(args.index), driveID, folderPath)
+        else:
+            items = drive_mirror.listTree(tokenProvider, driveID, folderPath)
+
+        cache = content_cache.ContentCache(args.cache, args.cache_size * 1048576) if args.cache else None
+        limiter = bandwidth_limiter.createLimiter(args.limit, args.limit_file)
+        transferQueue = bandwidth_limiter.TransferQueue(args.workers)
+
+        print(f"\nMirroring shard {args.shard_index} of {args.shard_count} into \"{args.dest}\"...")
+        downloaded, skipped, failed = drive_mirror.mirrorShard(tokenProvider, driveID, items, args.dest, checkpoint, transferQueue, cache, limiter)
+        transferQueue.shutdown()
+    finally:
+        checkpoint.release()
+
+    color = RED if failed else GREEN
+    print(f"\n{color}Shard {args.shard_index} of {args.shard_count}: {downloaded} downloaded, {skipped} already mirrored, {failed} failed{CLEAR}")
+    if failed:                                          # So schedulers and scripts can tell the shard needs another run
+        raise SystemExit(1)
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# Script by: DarkSplash
+# Last edited: 2026-10-19
+
+# Script to copy or move files and folders inside of SharePoint/OneDrive/Teams.
+# Unlike running the downloader and then the uploader, nothing is downloaded to
+# or uploaded from this PC, SharePoint copies/moves the item on its own servers.
+# Uses the same msal_config.env file and login process as the other scripts.
+
+import core.dotenv_checker as dotenv_checker            # Script to check msal_config.env variables
+import core.token_generator as token_generator          # Script to generate a MSAL token
+import core.drive_operations as drive_operations        # Script that does the server-side copies and moves
+
+import argparse
+
+# Packageless Terminal Colors: https://stackoverflow.com/a/21786287
+RED = "\x1b[1;31;40m"
+GREEN = "\x1b[1;32;40m"
+CLEAR = "\x1b[0m"
+
+
+
+def argparseInit():
+    """
+    Function for command line flags that can be added while running the script.
+    Both --copy and --move can be given as many times as needed, and every
+    operation is sent to SharePoint together.
+
+    Returns
+    -------
+    args : argparse.Namespace
+        Every flag the script was ran with.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-G","--gui", help="Runs the Selenium/Firefox portion of this script with a GUI instead of headlessly", action="store_true")
+    parser.add_argument("-N","--nomfa", help="Allows you to run the script without filling in the MFA_SECRET variable", action="store_true")
+    parser.add_argument("-P","--profile", help="Uses the msal_config.env variables prefixed with \"PROFILE__\" instead of the unprefixed ones")
+    parser.add_argument("--copy", nargs=2, action="append", default=[], metavar=("SOURCE", "FOLDER"), help="Copies the item at SOURCE into FOLDER, both are paths like M365_FOLDER_PATH")
+    parser.add_argument("--move", nargs=2, action="append", default=[], metavar=("SOURCE", "FOLDER"), help="Moves the item at SOURCE into FOLDER, both are paths like M365_FOLDER_PATH")
+    parser.add_argument("--dest-drive", metavar="DRIVE_ID", help="Drive ID the destination folders are on (default: M365_DRIVE_ID)")
+    args = parser.parse_args()
+
+    if not args.copy and not args.move:
+        parser.error("at least one --copy or --move is required")
+    return args
+
+
+
+def buildOperations(tokenProvider, driveID: str, destDriveID: str, pairs: list) -> list:
+    """
+    Function turns (source path, destination folder path) pairs into the
+    operation dicts used by drive_operations. Every path is looked up in
+    batches, and any pair with a missing path is reported and left out.
+    """
+    sourceIDs = drive_operations.resolvePaths(tokenProvider, driveID, [source for source, folder in pairs])
+    folderIDs = drive_operations.resolvePaths(tokenProvider, destDriveID, [folder for source, folder in pairs])
+
+    operations = []
+    for (source, folder), sourceID, folderID in zip(pairs, sourceIDs, folderIDs):
+        if sourceID is None or folderID is None:
+            print(f"\n{RED}Skipping \"{source}\" -> \"{folder}\", {'source' if sourceID is None else 'destination folder'} not found{CLEAR}")
+            continue
+        operations.append({"driveID": driveID, "itemID": sourceID, "destDriveID": destDriveID, "destFolderID": folderID,
+                           "label": f"\"{source}\" -> \"{folder}\""})
+    return operations
+
+
+
+def main():
+    args = argparseInit()                               # Checking for command flags
+    useMFA = not args.nomfa
+    config = dotenv_checker.dotenvInit(useMFA, dotenv_checker.DRIVE_KEYS, args.profile)
+
+    tokenProvider = token_generator.tokenGen(args.gui, useMFA, config)
+
+    driveID = config.driveID
+    destDriveID = args.dest_drive or driveID
+
+    print("\nResolving paths...")
+    copies = buildOperations(tokenProvider, driveID, destDriveID, args.copy)
+    moves = buildOperations(tokenProvider, driveID, destDriveID, args.move)
+
+    print("\nCopying and moving items (large items can take a while)...")
+    results = list(zip(copies, drive_operations.copyItems(tokenProvider, copies))) + list(zip(moves, drive_operations.moveItems(tokenProvider, moves)))
+
+    for operation, ok in results:
+        if ok:
+            print(f"\n{GREEN}{operation['label']} completed!{CLEAR}")
+        else:
+            print(f"\n{RED}{operation['label']} failed!{CLEAR}")
+
+
+
+if __name__ == "__main__":
+    main()
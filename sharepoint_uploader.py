@@ -1,5 +1,5 @@
 # Script by: DarkSplash
-# Last edited: 2023-01-12
+# Last edited: 2026-10-19
 
 # This is a 100% working Python script that will upload a local file to a 
 # SharePoint/OneDrive/Teams location. This script supports MFA & non-MFA logins,
@@ -10,10 +10,15 @@
 import core.dotenv_checker as dotenv_checker            # Script to check msal_config.env variables
 import core.token_generator as token_generator          # Script to generate a MSAL token
 import core.driveid_finder as driveid_finder            # Script to attempt to find a SharePoint/OneDrive/Teams drive_id
+import core.drive_operations as drive_operations        # Script for batched Graph requests
+import core.bandwidth_limiter as bandwidth_limiter      # Script to share a bandwidth limit between transfers
 
 import argparse
+import fnmatch
+import itertools
 import os
 import requests
+import sys
 import urllib
 
 from pathlib import Path
@@ -24,6 +29,9 @@ GREEN = "\x1b[1;32;40m"
 BLUE = "\x1b[1;34;40m"
 CLEAR = "\x1b[0m"
 
+SIMPLE_UPLOAD_LIMIT = 4194304                           # 4 MiB, largest file Graph accepts in a single PUT
+UPLOAD_CHUNK_SIZE = 10485760                            # 10 MiB, upload session chunks must be a multiple of 320 KiB (327680 bytes)
+DEFAULT_WORKERS = 8                                     # How many files a directory upload sends at the same time
 
 
 def argparseInit():
@@ -46,15 +54,43 @@ def argparseInit():
         A flag that will be set to True if the user wishes to attempt to find
         their drive id through the script. By default set to False, and can be
         set to True with the -D or --driveid args.
+    fromStdin : bool
+        A flag that will be set to True if the user wishes to upload whatever
+        is piped into the script instead of a local file. By default set to
+        False, and can be set to True with the -S or --stdin args.
+    uploadDir : str or None
+        A local directory whose whole tree will be uploaded into
+        M365_FOLDER_PATH, set with the -R or --recursive args. By default set
+        to None, meaning only M365_FILENAME is uploaded.
+    workers : int
+        How many files a directory upload sends at the same time, set with the
+        -W or --workers args. By default set to DEFAULT_WORKERS.
+    limiter : bandwidth_limiter.BandwidthLimiter or None
+        The bandwidth limit shared by every transfer, created from the -L or
+        --limit and --limit-file args. By default set to None (unlimited).
+    urgentPatterns : list of str
+        Filename globs set with the --urgent arg. Directory uploads send
+        matching files first and give them bandwidth before any other file.
+    profile : str or None
+        The msal_config.env profile to use, set with the -P or --profile args.
+        By default set to None, meaning the variables without a prefix are used.
     """
     guiFlag = False
     useMFA = True
     runDriveID = False
+    fromStdin = False
 
     parser = argparse.ArgumentParser()
     parser.add_argument("-G","--gui", help="Runs the Selenium/Firefox portion of this script with a GUI instead of headlessly", action="store_true")
     parser.add_argument("-N","--nomfa", help="Allows you to run the script without filling in the MFA_SECRET variable", action="store_true")
     parser.add_argument("-D","--driveid", help="Runs two different methods to attempt to find your M365_DRIVE_ID variable", action="store_true")
+    parser.add_argument("-S","--stdin", help="Uploads the data piped into the script as M365_FILENAME instead of reading a local file", action="store_true")
+    parser.add_argument("-R","--recursive", metavar="DIR", help="Uploads everything inside the local directory DIR into M365_FOLDER_PATH, creating any missing folders")
+    parser.add_argument("-W","--workers", type=int, default=DEFAULT_WORKERS, help=f"How many files -R uploads at the same time (default: {DEFAULT_WORKERS})")
+    parser.add_argument("-L","--limit", type=int, metavar="KIB", help="Limits the upload to this many KiB per second")
+    parser.add_argument("--limit-file", metavar="FILE", help="Re-reads the KiB per second limit from FILE every 5 seconds so it can be changed while uploading (0 is unlimited)")
+    parser.add_argument("--urgent", action="append", default=[], metavar="PATTERN", help="With -R, uploads files matching this glob (such as \"*.json\") ahead of and faster than the rest, can be repeated")
+    parser.add_argument("-P","--profile", help="Uses the msal_config.env variables prefixed with \"PROFILE__\" instead of the unprefixed ones")
     args = parser.parse_args()
 
     if args.gui:
@@ -66,22 +102,117 @@ def argparseInit():
     if args.driveid:
         print("\nScript will only attempt to generate drive_id's...")
         runDriveID = True
-    if guiFlag == False and useMFA == True and runDriveID == False:
+    if args.stdin:
+        print("\nFile will be read from stdin instead of from disk...")
+        fromStdin = True
+    if args.recursive is not None:
+        if not os.path.isdir(args.recursive):           # Otherwise os.walk() finds nothing and the upload "succeeds"
+            print(f"\n{RED}Directory \"{args.recursive}\" does not exist or is not a directory{CLEAR}")
+            print("\nExiting script...")
+            raise SystemExit(1)
+        print(f"\nEverything inside \"{args.recursive}\" will be uploaded...")
+    if args.limit or args.limit_file:
+        print(f"\nUpload will be limited to {args.limit or 'the number in ' + args.limit_file} KiB per second...")
+    if args.profile:
+        print(f"\nUsing the \"{args.profile}\" profile from msal_config.env...")
+    limiter = bandwidth_limiter.createLimiter(args.limit, args.limit_file)
+    if guiFlag == False and useMFA == True and runDriveID == False and fromStdin == False and args.recursive is None and args.profile is None:
         print(f"\n{BLUE}Optional runtime argument can be displayed by adding the \'-h\' flag to the end of your python command above.{CLEAR}")
     
-    return guiFlag, useMFA, runDriveID
+    return guiFlag, useMFA, runDriveID, fromStdin, args.recursive, args.workers, limiter, args.urgent, args.profile
 
 
 
-def uploadFile(token):
-    headers = {'Authorization': 'Bearer {}'.format(token['access_token'])}  # Header will be used for authentication with Microsoft Graph
+def alignedChunks(byteIterator, chunkSize: int = UPLOAD_CHUNK_SIZE):
+    """
+    Generator function that takes any iterator of bytes objects, no matter how
+    big or small each piece is, and re-buffers them into chunks that are exactly
+    chunkSize bytes long. Only the very last chunk can be shorter. This keeps
+    every chunk but the last one on the 320 KiB boundary upload sessions need.
+
+    Parameters
+    ----------
+    byteIterator : iterable of bytes
+        Anything that yields bytes, such as a generator, a list of bytes, or
+        iter(lambda: file.read(n), b"") for a file-like object like stdin.
+    chunkSize : int
+        The size every chunk except the last will be. Should be a multiple of
+        327680 bytes. By default this is UPLOAD_CHUNK_SIZE (10 MiB).
+
+    Yields
+    ------
+    chunk : bytes
+        The next chunkSize bytes of data, or whatever is left at the end.
+    """
+    buffer = bytearray()
+    for piece in byteIterator:
+        buffer += piece
+        while len(buffer) >= chunkSize:                 # Only ever holds one chunk plus the last piece read in memory
+            yield bytes(buffer[:chunkSize])
+            del buffer[:chunkSize]
+    if buffer:
+        yield bytes(buffer)
+
 
-    fullRelativePath = urllib.parse.quote(f'{os.environ.get("M365_FOLDER_PATH")}/{os.environ.get("M365_FILENAME")}')
-    fileRelativePath = urllib.parse.quote(f'{os.environ.get("M365_FILENAME")}')
-    folderRelativePath = urllib.parse.quote(f'{os.environ.get("M365_FOLDER_PATH")}')
+
+def putSessionChunks(uploadURL: str, chunks, size: int = None, limiter=None, priority: int = bandwidth_limiter.PRIORITY_NORMAL):
+    """
+    Function uploads chunks to an already created upload session. Reads one
+    chunk ahead so it knows which chunk is the final one. If size is unknown,
+    every chunk but the final one is sent with a "*" total in its
+    Content-Range header, and the final one is sent with the real total.
+
+    Parameters
+    ----------
+    uploadURL : str
+        The "uploadUrl" value returned by Graph's createUploadSession API.
+    chunks : iterable of bytes
+        The data to upload, every chunk except the last must be a multiple of
+        327680 bytes long (see alignedChunks()).
+    size : int, optional
+        The total size of the upload if it is known ahead of time.
+    limiter : bandwidth_limiter.BandwidthLimiter, optional
+        Shared bandwidth limit every chunk is sent through.
+    priority : int, optional
+        The upload's priority when sharing the limiter.
+
+    Returns
+    -------
+    result : requests.Response
+        The response to the final chunk, which has the uploaded item's JSON.
+    """
+    chunks = iter(chunks)
+    chunk = next(chunks, b"")
+    start = 0
+    while True:
+        nextChunk = next(chunks, None)                  # Reading ahead to find out if this is the last chunk
+        bytesRead = len(chunk)
+        if nextChunk is None:
+            total = start + bytesRead                   # Total is finally known once the stream runs out
+        else:
+            total = size if size is not None else "*"
+        result = requests.put(uploadURL,
+                headers={
+                    'Content-Length': str(bytesRead),
+                    'Content-Range': f'bytes {start}-{start + bytesRead - 1}/{total}'
+                },
+                data=bandwidth_limiter.throttleBody(limiter, chunk, priority)
+            )
+        result.raise_for_status()
+        start += bytesRead
+        if nextChunk is None:
+            return result
+        chunk = nextChunk
+
+
+
+def uploadFile(tokenProvider, config, limiter=None, priority: int = bandwidth_limiter.PRIORITY_NORMAL):
+    fullRelativePath = urllib.parse.quote(f'{config.folderPath}/{config.filename}')
+    fileRelativePath = urllib.parse.quote(f'{config.filename}')
+    folderRelativePath = urllib.parse.quote(f'{config.folderPath}')
 
     # Checking to see if file exists
-    result = requests.get(f'https://graph.microsoft.com/v1.0/drives/{os.environ.get("M365_DRIVE_ID")}/root:/{fullRelativePath}', headers=headers)
+    result = tokenProvider.get(f'https://graph.microsoft.com/v1.0/drives/{config.driveID}/root:/{fullRelativePath}')
     if result.status_code == 200:
         fileExists = True
         fileID = result.json()['id']
@@ -90,79 +221,314 @@ def uploadFile(token):
         fileID = ''
 
     # Getting folder ID
-    result = requests.get(f'https://graph.microsoft.com/v1.0/drives/{os.environ.get("M365_DRIVE_ID")}/root:/{folderRelativePath}', headers=headers)
+    result = tokenProvider.get(f'https://graph.microsoft.com/v1.0/drives/{config.driveID}/root:/{folderRelativePath}')
     folderID = result.json()['id']
 
     # Getting local filesize
-    stringPath = f'{os.getcwd()}/{os.environ.get("M365_FILENAME")}'
+    stringPath = f'{os.getcwd()}/{config.filename}'
 
     if Path(stringPath).exists():
         uploadPath = Path(stringPath)
         st = os.stat(uploadPath)
         size = st.st_size
 
-    if size <= 4194304:
+    if size <= SIMPLE_UPLOAD_LIMIT:
         if fileExists:
-            result = requests.put(
-            f'https://graph.microsoft.com/v1.0/drives/{os.environ.get("M365_DRIVE_ID")}/items/{fileID}/content',
-            headers = headers,
-            data=open(os.environ.get("M365_FILENAME"), 'rb').read()
+            result = tokenProvider.put(
+            f'https://graph.microsoft.com/v1.0/drives/{config.driveID}/items/{fileID}/content',
+            data=bandwidth_limiter.throttleBody(limiter, open(config.filename, 'rb').read(), priority)
             )
         else:
-            result = requests.put(f'https://graph.microsoft.com/v1.0/drives/{os.environ.get("M365_DRIVE_ID")}/items/{folderID}:/{fileRelativePath}:/content'
-                            ,headers = headers
-                            ,data = open(os.environ.get("M365_FILENAME"), 'rb').read()
+            result = tokenProvider.put(f'https://graph.microsoft.com/v1.0/drives/{config.driveID}/items/{folderID}:/{fileRelativePath}:/content'
+                            ,data = bandwidth_limiter.throttleBody(limiter, open(config.filename, 'rb').read(), priority)
                                 )
     else:
-        result = requests.post(
-        f'https://graph.microsoft.com/v1.0/drives/{os.environ.get("M365_DRIVE_ID")}/items/{folderID}:/{fileRelativePath}:/createUploadSession',
-        headers={'Authorization': 'Bearer ' + token['access_token']},
+        result = tokenProvider.post(
+        f'https://graph.microsoft.com/v1.0/drives/{config.driveID}/items/{folderID}:/{fileRelativePath}:/createUploadSession',
         json={
             '@microsoft.graph.conflictBehavior': 'replace',
             'description': 'Uploading a large file',
             'fileSystemInfo': {'@odata.type': 'microsoft.graph.fileSystemInfo'},
-            'name': os.environ.get("M365_FILENAME")
+            'name': config.filename
             }
             )
         upload_url = result.json()['uploadUrl']
-        CHUNK_SIZE = 10485760
-        chunks = int(size / CHUNK_SIZE) + 1 if size % CHUNK_SIZE > 0 else 0
-        with open(os.environ.get("M365_FILENAME"), 'rb') as fd:
-            start = 0
-            for chunk_num in range(chunks):
-                chunk = fd.read(CHUNK_SIZE)
-                bytes_read = len(chunk)
-                upload_range = f'bytes {start}-{start + bytes_read - 1}/{size}'
-                result = requests.put(upload_url,
-                        headers={
-                            'Content-Length': str(bytes_read),
-                            'Content-Range': upload_range
-                        },
-                        data=chunk
-                    )
-                result.raise_for_status()
-                start += bytes_read
+        with open(config.filename, 'rb') as fd:
+            putSessionChunks(upload_url, alignedChunks(iter(lambda: fd.read(UPLOAD_CHUNK_SIZE), b"")), size, limiter, priority)
     
-    fileCheck = requests.get(f'https://graph.microsoft.com/v1.0/drives/{os.environ.get("M365_DRIVE_ID")}/root:/{fullRelativePath}', headers=headers)
+    fileCheck = tokenProvider.get(f'https://graph.microsoft.com/v1.0/drives/{config.driveID}/root:/{fullRelativePath}')
     if fileCheck.status_code == 200:
-        print(f"\n{GREEN}File \"{os.environ.get('M365_FILENAME')}\" has been sucessfully uploaded!{CLEAR}")
+        print(f"\n{GREEN}File \"{config.filename}\" has been sucessfully uploaded!{CLEAR}")
     else:
-        print(f"\n{RED}File \"{os.environ.get('M365_FILENAME')}\" has not been sucessfully uploaded!{CLEAR}")
+        print(f"\n{RED}File \"{config.filename}\" has not been sucessfully uploaded!{CLEAR}")
        
 
 
+def uploadStream(tokenProvider, config, byteIterator, limiter=None, priority: int = bandwidth_limiter.PRIORITY_NORMAL):
+    """
+    Function uploads data that doesn't exist as a local file yet, such as a
+    database dump being piped into the script. The data is re-buffered into
+    320 KiB aligned chunks with alignedChunks(), and since the total size is
+    unknown until the data runs out, the total is only sent with the final
+    chunk. If all of the data fits in a single chunk and is no bigger than
+    SIMPLE_UPLOAD_LIMIT, a simple PUT is used instead of an upload session.
+
+    Parameters
+    ----------
+    tokenProvider : token_generator.TokenProvider
+        The object returned by tokenGen(). Supplies the current (automatically
+        refreshed) token used for authentication with the Microsoft Graph API calls.
+    config : dotenv_checker.M365Config
+        The object returned by dotenvInit(). Supplies the drive, folder, and
+        filename the data is uploaded as.
+    byteIterator : iterable of bytes
+        The data that will be uploaded as M365_FILENAME into M365_FOLDER_PATH.
+    limiter : bandwidth_limiter.BandwidthLimiter, optional
+        Shared bandwidth limit the upload is sent through.
+    priority : int, optional
+        The upload's priority when sharing the limiter.
+    """
+    fullRelativePath = urllib.parse.quote(f'{config.folderPath}/{config.filename}')
+    fileRelativePath = urllib.parse.quote(f'{config.filename}')
+    folderRelativePath = urllib.parse.quote(f'{config.folderPath}')
+
+    # Getting folder ID
+    result = tokenProvider.get(f'https://graph.microsoft.com/v1.0/drives/{config.driveID}/root:/{folderRelativePath}')
+    folderID = result.json()['id']
+
+    chunks = alignedChunks(byteIterator)
+    firstChunk = next(chunks, b"")
+    secondChunk = next(chunks, None)
+
+    if secondChunk is None and len(firstChunk) <= SIMPLE_UPLOAD_LIMIT:  # Whole stream was small enough for one request
+        result = tokenProvider.put(f'https://graph.microsoft.com/v1.0/drives/{config.driveID}/items/{folderID}:/{fileRelativePath}:/content'
+                        ,data = bandwidth_limiter.throttleBody(limiter, firstChunk, priority)
+                            )
+        result.raise_for_status()
+    else:
+        result = tokenProvider.post(
+        f'https://graph.microsoft.com/v1.0/drives/{config.driveID}/items/{folderID}:/{fileRelativePath}:/createUploadSession',
+        json={
+            '@microsoft.graph.conflictBehavior': 'replace',
+            'description': 'Uploading a streamed file',
+            'fileSystemInfo': {'@odata.type': 'microsoft.graph.fileSystemInfo'},
+            'name': config.filename
+            }
+            )
+        upload_url = result.json()['uploadUrl']
+        firstChunks = [firstChunk] if secondChunk is None else [firstChunk, secondChunk]
+        putSessionChunks(upload_url, itertools.chain(firstChunks, chunks), None, limiter, priority)   # Putting the read-ahead chunks back in front
+
+    fileCheck = tokenProvider.get(f'https://graph.microsoft.com/v1.0/drives/{config.driveID}/root:/{fullRelativePath}')
+    if fileCheck.status_code == 200:
+        print(f"\n{GREEN}File \"{config.filename}\" has been sucessfully uploaded!{CLEAR}")
+    else:
+        print(f"\n{RED}File \"{config.filename}\" has not been sucessfully uploaded!{CLEAR}")
+
+
+
+def createFolders(tokenProvider, driveID: str, folderPaths: list):
+    """
+    Function makes sure every folder in folderPaths (and every folder above
+    them) exists on the drive. All of the folders are looked up in batches
+    first, and then the missing ones are created one depth level at a time so
+    a parent always exists before its children, with each level sent in
+    batches of GRAPH_BATCH_LIMIT.
+
+    Parameters
+    ----------
+    tokenProvider : token_generator.TokenProvider
+        The object returned by tokenGen(). Supplies the current (automatically
+        refreshed) token used for authentication with the Microsoft Graph API calls.
+    driveID : str
+        The drive the folders are on.
+    folderPaths : list of str
+        Folder paths relative to the drive root, such as "Builds/v2/docs".
+
+    Raises
+    ------
+    RuntimeError
+        If a folder could not be created.
+    """
+    allFolders = set()
+    for folderPath in folderPaths:
+        parts = folderPath.strip("/").split("/")
+        for depth in range(1, len(parts) + 1):
+            if parts[0]:
+                allFolders.add("/".join(parts[:depth]))
+    allFolders = sorted(allFolders, key=lambda path: (path.count("/"), path))
+
+    folderIDs = drive_operations.resolvePaths(tokenProvider, driveID, allFolders)
+    missing = [path for path, folderID in zip(allFolders, folderIDs) if folderID is None]
+
+    for depth in sorted(set(path.count("/") for path in missing)):
+        level = [path for path in missing if path.count("/") == depth]
+        requestList = []
+        for path in level:
+            parent, _, name = path.rpartition("/")
+            parentURL = f"/drives/{driveID}/root:/{urllib.parse.quote(parent)}:/children" if parent else f"/drives/{driveID}/root/children"
+            requestList.append({"method": "POST", "url": parentURL,
+                                "body": {"name": name, "folder": {}, "@microsoft.graph.conflictBehavior": "fail"}})
+        for path, response in zip(level, drive_operations.batchRequests(tokenProvider, requestList)):
+            if response["status"] not in (201, 409):    # 409 means it was created by someone else in the meantime
+                raise RuntimeError(f"Unable to create folder \"{path}\": {response.get('body')}")
+
+
+
+def uploadLocalFile(tokenProvider, driveID: str, remotePath: str, localPath: str, size: int, limiter=None, priority: int = bandwidth_limiter.PRIORITY_NORMAL):
+    """
+    Function uploads one local file to remotePath, replacing it if it already
+    exists. Files no bigger than SIMPLE_UPLOAD_LIMIT are sent with a single
+    PUT, bigger ones go through an upload session. Both address the file by
+    its path so no ID lookups are needed.
+
+    Parameters
+    ----------
+    tokenProvider : token_generator.TokenProvider
+        The object returned by tokenGen(). Supplies the current (automatically
+        refreshed) token used for authentication with the Microsoft Graph API calls.
+    driveID : str
+        The drive being uploaded to.
+    remotePath : str
+        The file's path relative to the drive root.
+    localPath : str
+        The file's path on this PC.
+    size : int
+        The file's size in bytes.
+    limiter : bandwidth_limiter.BandwidthLimiter, optional
+        Shared bandwidth limit the upload is sent through.
+    priority : int, optional
+        The upload's priority when sharing the limiter.
+    """
+    itemURL = f'https://graph.microsoft.com/v1.0/drives/{driveID}/root:/{urllib.parse.quote(remotePath)}'
+
+    if size <= SIMPLE_UPLOAD_LIMIT:
+        with open(localPath, 'rb') as fd:
+            result = tokenProvider.put(f'{itemURL}:/content', data=bandwidth_limiter.throttleBody(limiter, fd.read(), priority))
+        result.raise_for_status()
+    else:
+        result = tokenProvider.post(f'{itemURL}:/createUploadSession',
+                                    json={'item': {'@microsoft.graph.conflictBehavior': 'replace'}})
+        result.raise_for_status()
+        with open(localPath, 'rb') as fd:
+            putSessionChunks(result.json()['uploadUrl'], alignedChunks(iter(lambda: fd.read(UPLOAD_CHUNK_SIZE), b"")), size, limiter, priority)
+
+
+
+def filePriority(remotePath: str, size: int, urgentPatterns: list) -> int:
+    """
+    Function picks a file's priority for a directory upload. Files matching
+    one of urgentPatterns (by name or by full path) are urgent, files small
+    enough for a simple PUT are normal, and everything else is bulk.
+    """
+    fileName = remotePath.rpartition("/")[2]
+    if any(fnmatch.fnmatch(fileName, pattern) or fnmatch.fnmatch(remotePath, pattern) for pattern in urgentPatterns):
+        return bandwidth_limiter.PRIORITY_URGENT
+    return bandwidth_limiter.PRIORITY_NORMAL if size <= SIMPLE_UPLOAD_LIMIT else bandwidth_limiter.PRIORITY_BULK
+
+
+
+def uploadDirectory(tokenProvider, config, uploadDir: str, workers: int = DEFAULT_WORKERS, limiter=None, urgentPatterns: list = ()):
+    """
+    Function uploads every file under the local directory uploadDir into
+    M365_FOLDER_PATH, keeping the same folder layout. Missing remote folders
+    are created first with createFolders(), then the files are uploaded by
+    several threads at once sharing the same TokenProvider. Files are queued
+    by filePriority() and then smallest first so the many small files finish
+    quickly instead of waiting behind a few large ones.
+
+    Parameters
+    ----------
+    tokenProvider : token_generator.TokenProvider
+        The object returned by tokenGen(). Supplies the current (automatically
+        refreshed) token used for authentication with the Microsoft Graph API calls.
+    config : dotenv_checker.M365Config
+        The object returned by dotenvInit(). Supplies the drive and folder the
+        directory is uploaded into.
+    uploadDir : str
+        The local directory to upload.
+    workers : int
+        How many files are uploaded at the same time.
+    limiter : bandwidth_limiter.BandwidthLimiter, optional
+        Shared bandwidth limit every file is sent through. Urgent files are
+        given bytes before normal ones, and normal ones before bulk ones.
+    urgentPatterns : list of str, optional
+        Filename globs for files that should be uploaded first.
+
+    Raises
+    ------
+    SystemExit
+        Exits the script if a remote folder could not be created.
+    """
+    driveID = config.driveID
+    folderPath = config.folderPath.strip("/")
+
+    files = []                                          # (size, remote path, local path) for every file in the tree
+    folders = [folderPath]
+    for dirPath, dirNames, fileNames in os.walk(uploadDir):
+        relativeDir = Path(os.path.relpath(dirPath, uploadDir)).as_posix()
+        remoteDir = folderPath if relativeDir == "." else f"{folderPath}/{relativeDir}".strip("/")
+        folders.append(remoteDir)
+        for fileName in fileNames:
+            localPath = os.path.join(dirPath, fileName)
+            files.append((os.path.getsize(localPath), f"{remoteDir}/{fileName}".strip("/"), localPath))
+
+    print(f"\nCreating missing folders for {len(files)} files...")
+    try:
+        createFolders(tokenProvider, driveID, folders)
+    except RuntimeError as e:                           # Nothing can be uploaded into a folder that doesn't exist
+        print(f"\n{RED}{e}{CLEAR}")
+        print("\nExiting script...")
+        raise SystemExit(1)
+
+    print(f"\nUploading {len(files)} files with {workers} workers...")
+    failed = 0
+    transferQueue = bandwidth_limiter.TransferQueue(workers)
+    futures = []
+    for size, remotePath, localPath in files:
+        priority = filePriority(remotePath, size, urgentPatterns)
+        futures.append((remotePath, transferQueue.submit(uploadLocalFile, tokenProvider, driveID, remotePath, localPath, size, limiter, priority,
+                                                         priority=priority, sortKey=size)))    # Smallest files first inside each priority
+    for remotePath, future in futures:
+        try:
+            future.result()
+        except Exception as e:
+            print(f"\n{RED}File \"{remotePath}\" has not been sucessfully uploaded:{CLEAR} {e}")
+            failed += 1
+    transferQueue.shutdown()
+
+    if failed:
+        print(f"\n{RED}{failed} of {len(files)} files have not been sucessfully uploaded!{CLEAR}")
+    else:
+        print(f"\n{GREEN}All {len(files)} files have been sucessfully uploaded!{CLEAR}")
+
+
+
 def main():
-    guiFlag, useMFA, runDriveID = argparseInit()        # Checking for command flags
-    dotenv_checker.dotenvInit(useMFA, runDriveID)
+    guiFlag, useMFA, runDriveID, fromStdin, uploadDir, workers, limiter, urgentPatterns, profile = argparseInit() # Checking for command flags
+    if runDriveID:
+        required = dotenv_checker.TOKEN_KEYS
+    elif uploadDir:                                     # Directory uploads don't use M365_FILENAME
+        required = dotenv_checker.FOLDER_KEYS
+    else:
+        required = dotenv_checker.FILE_KEYS
+    config = dotenv_checker.dotenvInit(useMFA, required, profile)
 
-    token = token_generator.tokenGen(guiFlag, useMFA)
+    tokenProvider = token_generator.tokenGen(guiFlag, useMFA, config)
 
     if runDriveID:                                      # If the flag has been set to programatically check for drive_id's
-        driveid_finder.findDriveID(token)
+        driveid_finder.findDriveID(tokenProvider)
         raise SystemExit(0)                             # Exiting the script as none of the variables needed to download the file were checked
 
+    if uploadDir:                                       # Upload a whole directory tree instead of a single file
+        uploadDirectory(tokenProvider, config, uploadDir, workers, limiter, urgentPatterns)
+        return
+
     print("\nUploading file...")
-    uploadFile(token)                                   # Upload the file using the token for authentication
+    if fromStdin:                                       # Upload whatever is piped in, read UPLOAD_CHUNK_SIZE bytes at a time
+        uploadStream(tokenProvider, config, iter(lambda: sys.stdin.buffer.read(UPLOAD_CHUNK_SIZE), b""), limiter)
+    else:
+        uploadFile(tokenProvider, config, limiter)    # Upload the file using the token for authentication
 
 
 